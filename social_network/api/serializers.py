@@ -0,0 +1,117 @@
+import json
+
+from posts import thumbnails
+from posts.storage import media_storage
+
+POST_FIELDS = (
+    'pk',
+    'text',
+    'pub_date',
+    'image',
+    'image_width',
+    'image_height',
+    'image_variants',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__slug',
+    'group__title',
+)
+USER_FIELDS = (
+    'pk',
+    'username',
+    'first_name',
+    'last_name',
+)
+STATS_FIELDS = (
+    'stats__posts_count',
+    'stats__followers_count',
+    'stats__following_count',
+)
+GROUP_FIELDS = ('pk', 'slug', 'title', 'description')
+COMMENT_FIELDS = ('pk', 'text', 'created', 'author__username')
+
+
+def full_name(first_name, last_name):
+    """То же, что User.get_full_name, но без экземпляра модели."""
+    return f'{first_name} {last_name}'.strip()
+
+
+def posts(rows):
+    """Сериализует строки values(*POST_FIELDS) постов."""
+    thumbnail_urls = thumbnails.urls(
+        {row['image'] for row in rows if row['image']}
+    )
+    return [
+        {
+            'id': row['pk'],
+            'text': row['text'],
+            'pub_date': row['pub_date'].isoformat(),
+            'author': {
+                'username': row['author__username'],
+                'full_name': full_name(
+                    row['author__first_name'], row['author__last_name'],
+                ),
+            },
+            'group': {
+                'slug': row['group__slug'],
+                'title': row['group__title'],
+            } if row['group__slug'] else None,
+            'image': (
+                media_storage.url(row['image']) if row['image'] else None
+            ),
+            'image_width': row['image_width'],
+            'image_height': row['image_height'],
+            'variants': variants(row['image_variants']),
+            'thumbnail': thumbnail_urls.get(row['image']),
+        }
+        for row in rows
+    ]
+
+
+def variants(image_variants):
+    """Уменьшенные копии картинки с URL вместо имён файлов."""
+    if not image_variants:
+        return []
+    return [
+        {
+            'url': media_storage.url(variant['name']),
+            'format': variant['format'],
+            'width': variant['width'],
+            'height': variant['height'],
+        }
+        for variant in json.loads(image_variants)
+    ]
+
+
+def user(row):
+    """Сериализует строку values(*USER_FIELDS, *STATS_FIELDS)."""
+    return {
+        'username': row['username'],
+        'full_name': full_name(row['first_name'], row['last_name']),
+        'posts_count': row['stats__posts_count'],
+        'followers_count': row['stats__followers_count'],
+        'following_count': row['stats__following_count'],
+    }
+
+
+def group(row):
+    """Сериализует строку values(*GROUP_FIELDS)."""
+    return {
+        'slug': row['slug'],
+        'title': row['title'],
+        'description': row['description'],
+    }
+
+
+def comments(rows):
+    """Сериализует строки values(*COMMENT_FIELDS) комментариев."""
+    return [
+        {
+            'id': row['pk'],
+            'text': row['text'],
+            'created': row['created'].isoformat(),
+            'author': row['author__username'],
+        }
+        for row in rows
+    ]
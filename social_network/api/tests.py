@@ -0,0 +1,189 @@
+import shutil
+import tempfile
+from http import HTTPStatus
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.constants import POSTS_PAGE
+from posts.models import Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_PREGENERATE_ASYNC=False,
+)
+class FeedApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='TestAuthor', first_name='Иван', last_name='Петров',
+        )
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}',
+            )
+            for i in range(POSTS_PAGE + 3)
+        ]
+        cls.image_post = Post.objects.create(
+            author=cls.author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=(
+                    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+                    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+                    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+                    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+                    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+                    b'\x0A\x00\x3B'
+                ),
+                content_type='image/gif',
+            ),
+        )
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_index_walks_feed_without_models(self):
+        """Лента отдаётся по курсорам без создания экземпляров моделей."""
+        url = reverse('api:index')
+        seen = []
+        params = {}
+        with mock.patch.object(
+            Post, 'from_db', side_effect=AssertionError,
+        ), mock.patch.object(User, 'from_db', side_effect=AssertionError):
+            while True:
+                data = self.client.get(url, params).json()
+                seen.extend(post['id'] for post in data['results'])
+                if data['next'] is None:
+                    break
+                params = {'after': data['next']}
+        self.assertEqual(
+            seen, list(Post.objects.values_list('pk', flat=True)),
+        )
+
+    def test_index_queries(self):
+        """Анонимная лента: проверка свежести и одна выборка постов."""
+        url = reverse('api:index')
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        post = response.json()['results'][0]
+        self.assertEqual(post['id'], self.image_post.pk)
+        self.assertEqual(post['author']['full_name'], 'Иван Петров')
+        self.assertIsNone(post['group'])
+
+    def test_etag_differs_from_html_page(self):
+        """ETag страницы сайта не подходит одноимённой view API."""
+        etag = self.client.get(reverse('posts:index'))['ETag']
+        response = self.client.get(
+            reverse('api:index'), HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_thumbnail_url_is_precomputed(self):
+        """URL миниатюры берётся из кэша после генерации."""
+        url = reverse(
+            'api:post_detail', kwargs={'post_id': self.image_post.pk},
+        )
+        self.client.get(url)
+        data = self.client.get(url).json()
+        self.assertTrue(data['image'].endswith('.gif'))
+        self.assertTrue(data['thumbnail'].startswith(settings.MEDIA_URL))
+
+    def test_group_and_profile(self):
+        """Лента группы и профиль содержат сведения о группе и авторе."""
+        group = self.client.get(
+            reverse('api:group_list', kwargs={'slug': self.group.slug})
+        ).json()
+        self.assertEqual(group['group']['title'], self.group.title)
+        self.assertEqual(len(group['results']), POSTS_PAGE)
+        profile = self.reader_client.get(
+            reverse('api:profile', kwargs={'username': self.author})
+        ).json()
+        self.assertEqual(profile['author']['posts_count'], POSTS_PAGE + 4)
+        self.assertFalse(profile['following'])
+
+    def test_post_detail_comments(self):
+        """Пост отдаётся с комментариями и счётчиками автора."""
+        data = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': self.posts[0].pk})
+        ).json()
+        self.assertEqual(data['comments'][0]['author'], self.reader.username)
+        self.assertEqual(data['author']['username'], self.author.username)
+
+    def test_follow_feed(self):
+        """Лента подписок требует входа и содержит посты авторов."""
+        url = reverse('api:follow_index')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        Follow.objects.create(user=self.reader, author=self.author)
+        data = self.reader_client.get(url).json()
+        self.assertEqual(data['results'][0]['id'], self.image_post.pk)
+
+    def test_follow_feed_pages_by_timeline_index(self):
+        """Лента подписок листается по индексу ленты без сортировки."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        url = reverse('api:follow_index')
+        ids = []
+        query = ''
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                data = self.reader_client.get(url + query).json()
+            ids.extend(row['id'] for row in data['results'])
+            sql = next(
+                captured['sql'] for captured in queries.captured_queries
+                if 'ORDER BY' in captured['sql']
+                and 'posts_timelineentry' in captured['sql']
+            )
+            with connection.cursor() as db_cursor:
+                db_cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = ' '.join(str(row) for row in db_cursor.fetchall())
+            self.assertIn('timeline_user_pub_date_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+            if data['next'] is None:
+                break
+            query = f'?after={data["next"]}'
+        self.assertEqual(
+            ids, [self.image_post.pk, *(post.pk for post in reversed(
+                self.posts
+            ))],
+        )
+
+    def test_missing_objects(self):
+        """Для несуществующих объектов возвращается JSON с 404."""
+        urls = (
+            reverse('api:group_list', kwargs={'slug': 'missing'}),
+            reverse('api:profile', kwargs={'username': 'missing'}),
+            reverse('api:post_detail', kwargs={'post_id': 0}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+                self.assertIn('detail', response.json())
@@ -0,0 +1,136 @@
+from http import HTTPStatus
+
+from django.db.models import F
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from posts import follow_graph, stats
+from posts.conditional import (
+    conditional, group_freshness, index_freshness, post_freshness,
+    profile_freshness,
+)
+from posts.constants import FEED_ORDERING, POSTS_PAGE, TIMELINE_ORDERING
+from posts.models import Comment, Group, Post, User
+from posts.utils import CursorPaginator
+from . import serializers
+
+
+def json_response(data, status=HTTPStatus.OK):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def error(detail, status):
+    return json_response({'detail': detail}, status=status)
+
+
+def feed_response(request, post_list, ordering=FEED_ORDERING, **extra):
+    """Страница ленты в JSON с курсорами after/before.
+
+    Поля ordering добавляются в values: из них строятся курсоры.
+    """
+    fields = dict.fromkeys((
+        *serializers.POST_FIELDS,
+        *(field.lstrip('-') for field in ordering),
+    ))
+    paginator = CursorPaginator(
+        post_list.values(*fields), POSTS_PAGE, ordering=ordering,
+    )
+    page = paginator.page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return json_response({
+        **extra,
+        'results': serializers.posts(page.object_list),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def user_row(**filters):
+    """Пользователь со счётчиками, отсутствующие счётчики пересчитываются."""
+    users = User.objects.filter(**filters).values(
+        *serializers.USER_FIELDS, *serializers.STATS_FIELDS,
+    )
+    row = users.first()
+    if row is not None and row['stats__posts_count'] is None:
+        stats.rebuild([row['pk']])
+        row = users.first()
+    return row
+
+
+@require_GET
+@conditional(index_freshness)
+def index(request):
+    """Общая лента."""
+    return feed_response(request, Post.objects.all())
+
+
+@require_GET
+@conditional(group_freshness)
+def group_posts(request, slug):
+    """Лента группы."""
+    row = Group.objects.filter(slug=slug).values(
+        *serializers.GROUP_FIELDS,
+    ).first()
+    if row is None:
+        return error('Группа не найдена.', HTTPStatus.NOT_FOUND)
+    return feed_response(
+        request,
+        Post.objects.filter(group_id=row['pk']),
+        group=serializers.group(row),
+    )
+
+
+@require_GET
+@conditional(profile_freshness)
+def profile(request, username):
+    """Профиль автора и его посты."""
+    row = user_row(username=username)
+    if row is None:
+        return error('Пользователь не найден.', HTTPStatus.NOT_FOUND)
+    following = request.user.is_authenticated and follow_graph.is_following(
+        request.user.pk, row['pk'],
+    )
+    return feed_response(
+        request,
+        Post.objects.filter(author_id=row['pk']),
+        author=serializers.user(row),
+        following=following,
+    )
+
+
+@require_GET
+@conditional(post_freshness)
+def post_detail(request, post_id):
+    """Пост с комментариями."""
+    row = Post.objects.filter(pk=post_id).values(
+        *serializers.POST_FIELDS, 'author_id',
+    ).first()
+    if row is None:
+        return error('Пост не найден.', HTTPStatus.NOT_FOUND)
+    author = user_row(pk=row['author_id'])
+    comments = Comment.objects.filter(post_id=post_id).order_by(
+        'created',
+    ).values(*serializers.COMMENT_FIELDS)
+    return json_response({
+        **serializers.posts([row])[0],
+        'author': serializers.user(author),
+        'comments': serializers.comments(comments),
+    })
+
+
+@require_GET
+def follow_index(request):
+    """Лента подписок текущего пользователя."""
+    if not request.user.is_authenticated:
+        return error('Требуется авторизация.', HTTPStatus.UNAUTHORIZED)
+    posts = Post.objects.filter(
+        timeline_entries__user=request.user,
+    ).annotate(
+        feed_date=F('timeline_entries__pub_date'),
+        feed_post=F('timeline_entries__post_id'),
+    )
+    return feed_response(request, posts, ordering=TIMELINE_ORDERING)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     """Config для приложения Core."""
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
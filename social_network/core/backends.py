@@ -0,0 +1,41 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from posts import feed_cache
+
+# Пользователь хранится недолго: сигналы сбрасывают кэш при сохранении,
+# но обновления через QuerySet.update их не вызывают.
+USER_CACHE_TIMEOUT = 60 * 5
+# Поколение пользователей хранится в базе рядом с поколениями лент,
+# поэтому смену пароля или блокировку видят все процессы.
+GENERATION_KEY = 'auth:generation'
+
+
+def user_cache_key(user_id):
+    generation = feed_cache.generation(GENERATION_KEY)
+    return f'auth:user:{generation}:{user_id}'
+
+
+def forget(user_id):
+    """Удаляет пользователя из кэша этого процесса."""
+    cache.delete(user_cache_key(user_id))
+
+
+def invalidate(user_id):
+    """Делает устаревшими закэшированных пользователей во всех
+    процессах.
+    """
+    feed_cache.bump(GENERATION_KEY)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, берущий пользователя сессии из кэша."""
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
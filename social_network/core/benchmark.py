@@ -0,0 +1,241 @@
+import math
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from api import urls as api_urls
+from posts import urls as posts_urls
+from posts.constants import POSTS_PAGE
+from posts.models import Post
+from users import urls as users_urls
+
+BENCHMARKED_URLCONFS = (posts_urls, users_urls, api_urls)
+# После этих маршрутов сессия недействительна, вход выполняется заново.
+SESSION_DESTROYING = {'users:logout'}
+# Страница ленты через include карточки и через сохранённые карточки.
+CARD_RENDER_PATHS = (
+    (
+        'include',
+        '{% for post in posts %}'
+        "{% include 'posts/includes/post_card.html' %}"
+        '{% endfor %}',
+    ),
+    (
+        'stored',
+        '{% load post_cards %}{% post_cards posts as cards %}'
+        '{% for post, card in cards %}{{ card }}{% endfor %}',
+    ),
+)
+
+
+@dataclass
+class RouteResult:
+    """Результат замеров одного маршрута."""
+    name: str
+    url: str
+    authenticated: bool
+    status: int
+    requests: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    queries: int
+    alloc_peak_kb: float
+
+
+class QueryCounter:
+    """Считает запросы к базе через execute_wrapper.
+
+    CaptureQueriesContext не подходит: обработчик WSGI очищает журнал
+    запросов в начале каждого запроса.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True,
+            check=True,
+            cwd=settings.BASE_DIR,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkRunner:
+    """Прогоняет GET-запросы ко всем маршрутам через WSGI-приложение."""
+
+    def __init__(self, requests=50, warmup=3, log=print):
+        self.requests = requests
+        self.warmup = warmup
+        self.log = log
+        self.application = WSGIHandler()
+        self.factory = RequestFactory()
+
+    def sample_kwargs(self):
+        """Значения параметров маршрутов из существующих данных."""
+        post = Post.objects.select_related('author', 'group').exclude(
+            group=None,
+        ).first() or Post.objects.select_related('author').first()
+        if post is None:
+            raise ValueError('Нет постов для замеров, запустите seed_data.')
+        user = post.author
+        return user, {
+            'post_id': post.pk,
+            'username': user.username,
+            'slug': post.group.slug if post.group else 'missing',
+            'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+            'token': default_token_generator.make_token(user),
+        }
+
+    def routes(self, values):
+        for urlconf in BENCHMARKED_URLCONFS:
+            for pattern in urlconf.urlpatterns:
+                name = f'{urlconf.app_name}:{pattern.name}'
+                kwargs = {
+                    key: values[key] for key in pattern.pattern.converters
+                }
+                yield name, reverse(name, kwargs=kwargs)
+
+    def run(self, authenticated=(False, True)):
+        user, values = self.sample_kwargs()
+        results = []
+        for is_authenticated in authenticated:
+            for name, url in self.routes(values):
+                result = self.measure(
+                    name, url, user if is_authenticated else None,
+                )
+                self.log(
+                    f'{name:32} {"auth" if is_authenticated else "anon"} '
+                    f'{result.status} p50={result.p50_ms:.2f}ms '
+                    f'p95={result.p95_ms:.2f}ms p99={result.p99_ms:.2f}ms '
+                    f'queries={result.queries} '
+                    f'alloc={result.alloc_peak_kb:.0f}KB'
+                )
+                results.append(result)
+        return {
+            'commit': current_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'requests': self.requests,
+            'routes': [asdict(result) for result in results],
+            'card_rendering': self.compare_card_rendering(),
+        }
+
+    def compare_card_rendering(self):
+        """Время рендеринга страницы карточек двумя способами."""
+        posts = list(Post.objects.for_feed()[:POSTS_PAGE])
+        results = {}
+        for name, source in CARD_RENDER_PATHS:
+            template = Template(source)
+            context = Context({'posts': posts})
+            # Первый рендеринг сохраняет карточки в кэш.
+            for _ in range(max(self.warmup, 1)):
+                template.render(context)
+            timings = []
+            for _ in range(self.requests):
+                started = time.perf_counter()
+                template.render(context)
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = {
+                'p50_ms': percentile(timings, 50),
+                'p95_ms': percentile(timings, 95),
+                'mean_ms': sum(timings) / len(timings),
+            }
+            self.log(
+                f'{"cards:" + name:32} p50={results[name]["p50_ms"]:.2f}ms '
+                f'p95={results[name]["p95_ms"]:.2f}ms'
+            )
+        return results
+
+    # Замер повторяет запрос десятки раз и упирался бы в ограничения
+    # частоты, например profile_follow отвечал бы 429.
+    @override_settings(RATELIMIT_ENABLED=False)
+    def measure(self, name, url, user):
+        cookie = self.login(user)
+        fresh_session = user is not None and name in SESSION_DESTROYING
+        for _ in range(self.warmup):
+            cookie = self.login(user) if fresh_session else cookie
+            self.request(url, cookie)
+        timings = []
+        for _ in range(self.requests):
+            cookie = self.login(user) if fresh_session else cookie
+            started = time.perf_counter()
+            status = self.request(url, cookie)
+            timings.append((time.perf_counter() - started) * 1000)
+        cookie = self.login(user) if fresh_session else cookie
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            self.request(url, cookie)
+        cookie = self.login(user) if fresh_session else cookie
+        tracemalloc.start()
+        try:
+            self.request(url, cookie)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return RouteResult(
+            name=name,
+            url=url,
+            authenticated=user is not None,
+            status=status,
+            requests=self.requests,
+            p50_ms=percentile(timings, 50),
+            p95_ms=percentile(timings, 95),
+            p99_ms=percentile(timings, 99),
+            mean_ms=sum(timings) / len(timings),
+            queries=queries.count,
+            alloc_peak_kb=peak / 1024,
+        )
+
+    def login(self, user):
+        """Cookie сессии пользователя или пустая строка для анонима."""
+        if user is None:
+            return ''
+        client = Client()
+        client.force_login(user)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+        return f'{settings.SESSION_COOKIE_NAME}={session}'
+
+    def request(self, url, cookie):
+        environ = self.factory.get(url, HTTP_COOKIE=cookie).environ
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(status)
+
+        response = self.application(environ, start_response)
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return int(statuses[0].split()[0])
@@ -0,0 +1,21 @@
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import metrics
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """Учитывает попадания и промахи кэша в метриках запроса.
+
+    get_many и get_or_set базового класса сводятся к get.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        metrics.add_cache_result(value is not _MISSING)
+        return default if value is _MISSING else value
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    """LocMemCache с учётом попаданий в метриках."""
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import BATCH_SIZE, Importer, ImportDataError
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует группы, посты, комментарии и подписки из дампов '
+        'NDJSON или CSV. Тип записи задаёт поле type. Повторный запуск '
+        'продолжает импорт с места сбоя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='+',
+            help='Файлы дампа в порядке импорта.',
+        )
+        parser.add_argument(
+            '--source',
+            default='import',
+            help='Имя источника: ключ позиций и id постов в дампе.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=('ndjson', 'csv'),
+            default=None,
+            help='Формат файлов, по умолчанию по расширению.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--skip-rebuild',
+            action='store_true',
+            help='Не пересчитывать счётчики, ленты и поисковый индекс.',
+        )
+
+    def handle(self, *args, **options):
+        importer = Importer(
+            source=options['source'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        try:
+            for path in options['paths']:
+                importer.import_file(path, options['format'])
+        except (ImportDataError, OSError) as error:
+            raise CommandError(error)
+        if not options['skip_rebuild']:
+            importer.rebuild()
+        if importer.counts['skipped']:
+            self.stdout.write(self.style.WARNING(
+                f'Пропущено комментариев без поста: '
+                f'{importer.counts["skipped"]}'
+            ))
+        self.stdout.write(self.style.SUCCESS('Импорт завершён'))
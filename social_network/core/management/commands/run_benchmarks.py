@@ -0,0 +1,49 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.benchmark import BenchmarkRunner
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку, число запросов к базе и память для маршрутов '
+        'posts и users и сохраняет результат в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--users',
+            choices=('anon', 'auth', 'both'),
+            default='both',
+            help='Замерять анонимные, авторизованные или все запросы.',
+        )
+        parser.add_argument(
+            '--output',
+            default='benchmark.json',
+            help='Файл для результатов.',
+        )
+
+    def handle(self, *args, **options):
+        authenticated = {
+            'anon': (False,),
+            'auth': (True,),
+            'both': (False, True),
+        }[options['users']]
+        runner = BenchmarkRunner(
+            requests=options['requests'],
+            warmup=options['warmup'],
+            log=self.stdout.write,
+        )
+        report = runner.run(authenticated)
+        directory = os.path.dirname(options['output'])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from core.seed import Seeder
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу синтетическими данными для нагрузочных замеров.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=300000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--images', type=int, default=20)
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько дней распределить даты публикаций.',
+        )
+        parser.add_argument(
+            '--alpha',
+            type=float,
+            default=1.1,
+            help='Показатель степенного распределения популярности.',
+        )
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--skip-rebuild',
+            action='store_true',
+            help='Не пересчитывать счётчики, ленты и поисковый индекс.',
+        )
+
+    def handle(self, *args, **options):
+        seeder = Seeder(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            images=options['images'],
+            days=options['days'],
+            alpha=options['alpha'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        seeder.run(rebuild=not options['skip_rebuild'])
+        self.stdout.write(self.style.SUCCESS('Данные созданы'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from core import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет кэши первых страниц главной, популярных групп и '
+        'профилей. LocMemCache прогревается только в процессе команды, '
+        'для рабочих процессов есть WARM_CACHES_ON_START в wsgi.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=warmup.PAGES)
+        parser.add_argument('--groups', type=int, default=warmup.GROUPS)
+        parser.add_argument('--profiles', type=int, default=warmup.PROFILES)
+        parser.add_argument('--workers', type=int, default=warmup.WORKERS)
+        parser.add_argument(
+            '--budget',
+            type=float,
+            default=warmup.BUDGET,
+            help='Время в секундах, после которого прогрев прекращается.',
+        )
+
+    def handle(self, *args, **options):
+        warmer = warmup.CacheWarmer(
+            pages=options['pages'],
+            groups=options['groups'],
+            profiles=options['profiles'],
+            workers=options['workers'],
+            budget=options['budget'],
+            log=self.stdout.write,
+        )
+        pages = warmer.run()
+        self.stdout.write(self.style.SUCCESS(f'Прогрето страниц: {pages}'))
@@ -0,0 +1,83 @@
+import os
+import re
+
+from django.conf import settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from posts.storage import is_content_addressed
+
+# Файлы, названные по содержимому, не меняются и кэшируются на год.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CACHE_CONTROL = 'public, max-age=3600'
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def is_immutable(name):
+    """Картинки постов и их копии названы по хэшу, миниатюры sorl -
+    по хэшу исходника и параметров.
+    """
+    return (
+        is_content_addressed(name)
+        or name.startswith(thumbnail_settings.THUMBNAIL_PREFIX)
+    )
+
+
+def etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """Границы (start, end) включительно из заголовка Range.
+
+    Для отсутствующего или составного заголовка возвращает None, тогда
+    отдаётся весь файл. Для невыполнимого диапазона - ValueError.
+    """
+    match = BYTE_RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # Суффикс: последние last байт.
+        length = int(last)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class RangeFile:
+    """Файл, из которого читается только диапазон байтов.
+
+    Без fileno, чтобы wsgi.file_wrapper не отправил файл целиком.
+    """
+
+    def __init__(self, file, start, end):
+        self._file = file
+        self._file.seek(start)
+        self._remaining = end - start + 1
+
+    def read(self, size=-1):
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+def sendfile_headers(name, path):
+    """Заголовок передачи файла фронт-прокси или пустой словарь."""
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header == 'X-Accel-Redirect':
+        return {header: settings.MEDIA_ACCEL_PREFIX + name}
+    if header == 'X-Sendfile':
+        return {header: os.path.abspath(path)}
+    return {}
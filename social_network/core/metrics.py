@@ -0,0 +1,177 @@
+"""Гистограммы времени обработки запросов по именам маршрутов.
+
+Метрики хранятся в памяти процесса: каждый воркер отдаёт свои значения,
+суммирует их Prometheus.
+"""
+import bisect
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_current = ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus с накопительными корзинами."""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """Показатели одного запроса, собираемые по ходу обработки."""
+    __slots__ = (
+        'started', 'db_time', 'queries', 'template_time',
+        'cache_hits', 'cache_misses',
+    )
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка execute_wrapper для учёта запросов к базе."""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - started
+            self.queries += 1
+
+
+HISTOGRAMS = (
+    ('http_request_duration_seconds', 'Время обработки запроса.',
+     DURATION_BUCKETS),
+    ('http_request_db_duration_seconds', 'Время запросов к базе.',
+     DURATION_BUCKETS),
+    ('http_request_template_duration_seconds', 'Время рендеринга шаблонов.',
+     DURATION_BUCKETS),
+    ('http_request_queries', 'Число запросов к базе.', QUERY_BUCKETS),
+)
+COUNTERS = (
+    ('http_responses_total', 'Ответы по статусам.'),
+    ('http_request_cache_total', 'Обращения к кэшу.'),
+)
+
+
+def start():
+    """Начинает сбор показателей текущего запроса."""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish(metrics, token, view, status):
+    """Переносит показатели запроса в гистограммы."""
+    _current.reset(token)
+    duration = perf_counter() - metrics.started
+    observations = (
+        ('http_request_duration_seconds', duration),
+        ('http_request_db_duration_seconds', metrics.db_time),
+        ('http_request_template_duration_seconds', metrics.template_time),
+        ('http_request_queries', metrics.queries),
+    )
+    counters = (
+        (('http_responses_total', view, ('status', str(status))), 1),
+        (('http_request_cache_total', view, ('result', 'hit')),
+         metrics.cache_hits),
+        (('http_request_cache_total', view, ('result', 'miss')),
+         metrics.cache_misses),
+    )
+    with _lock:
+        for (name, _, buckets), (_, value) in zip(HISTOGRAMS, observations):
+            histogram = _histograms.get((name, view))
+            if histogram is None:
+                histogram = _histograms[(name, view)] = Histogram(buckets)
+            histogram.observe(value)
+        for key, value in counters:
+            if value:
+                _counters[key] = _counters.get(key, 0) + value
+
+
+def add_template_time(seconds):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.template_time += seconds
+
+
+def add_cache_result(hit):
+    metrics = _current.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _format_bound(bound):
+    return repr(float(bound))
+
+
+def render():
+    """Текстовый формат экспозиции Prometheus."""
+    with _lock:
+        histograms = {
+            key: (list(hist.counts), hist.sum, hist.count, hist.buckets)
+            for key, hist in _histograms.items()
+        }
+        counters = dict(_counters)
+    lines = []
+    for name, help_text, _ in HISTOGRAMS:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (metric, view), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            counts, total, count, buckets = values
+            label = f'view="{_escape(view)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{name}_bucket{{{label},le="{_format_bound(bound)}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{{label}}} {total}')
+            lines.append(f'{name}_count{{{label}}} {count}')
+    for name, help_text in COUNTERS:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for (metric, view, (key, value)), total in sorted(counters.items()):
+            if metric != name:
+                continue
+            lines.append(
+                f'{name}{{view="{_escape(view)}",{key}="{value}"}} {total}'
+            )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,59 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, routers
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+class MetricsMiddleware:
+    """Собирает время, запросы к базе, рендеринг и кэш по маршрутам."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics, token = metrics.start()
+        status = 500
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(request_metrics)
+                    )
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            match = request.resolver_match
+            metrics.finish(
+                request_metrics,
+                token,
+                match.view_name if match else UNRESOLVED_VIEW,
+                status,
+            )
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет чтения за основной базой после записи в запросе."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = routers.track_writes()
+        try:
+            response = self.get_response(request)
+            if settings.DATABASE_REPLICAS and routers.wrote():
+                response.set_cookie(
+                    routers.PIN_COOKIE,
+                    '1',
+                    max_age=routers.PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        finally:
+            routers.reset(token)
+        return response
@@ -0,0 +1,114 @@
+import ipaddress
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .views import too_many_requests
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """Разбирает строку вида '10/m' в пару (лимит, период в секундах)."""
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period]
+
+
+def client_ip(request):
+    """IP-адрес клиента с учётом доверенных прокси.
+
+    X-Forwarded-For читается справа налево, пока адрес принадлежит
+    одной из сетей TRUSTED_PROXIES; первый чужой адрес и есть клиент.
+    Без доверенных прокси заголовок подделывается клиентом и не
+    учитывается.
+    """
+    address = request.META.get('REMOTE_ADDR', '')
+    proxies = [
+        ipaddress.ip_network(proxy, strict=False)
+        for proxy in settings.TRUSTED_PROXIES
+    ]
+    if not proxies:
+        return address
+    hops = [
+        hop.strip()
+        for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+        if hop.strip()
+    ]
+    while hops and _is_trusted(address, proxies):
+        address = hops.pop()
+    return address
+
+
+def _is_trusted(address, proxies):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in proxy for proxy in proxies)
+
+
+def user_or_ip(request):
+    """Ключ политики: пользователь, а для анонимов - IP-адрес."""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def ip(request):
+    """Ключ политики: IP-адрес клиента."""
+    return f'ip:{client_ip(request)}'
+
+
+def hit(scope, identity, limit, period, now=None):
+    """Учитывает запрос в скользящем окне.
+
+    Окно приближается двумя соседними счётчиками в кэше: прошлый
+    учитывается с весом оставшейся от него доли. Проверка стоит одного
+    get_many и одного add или incr. Возвращает None, если запрос
+    разрешён, иначе число секунд до следующей попытки.
+    """
+    now = time.time() if now is None else now
+    window, offset = divmod(now, period)
+    prefix = f'ratelimit:{scope}:{period}:{identity}'
+    current_key = f'{prefix}:{int(window)}'
+    previous_key = f'{prefix}:{int(window) - 1}'
+    counts = cache.get_many([previous_key, current_key])
+    current = counts.get(current_key, 0)
+    previous = counts.get(previous_key, 0)
+    elapsed = offset / period
+    if previous * (1 - elapsed) + current >= limit:
+        if current >= limit:
+            wait = period - offset
+        else:
+            wait = (1 - (limit - current) / previous - elapsed) * period
+        return max(math.ceil(wait), 1)
+    if not cache.add(current_key, 1, period * 2):
+        try:
+            cache.incr(current_key)
+        except ValueError:
+            # Счётчик истёк между add и incr.
+            cache.add(current_key, 1, period * 2)
+    return None
+
+
+def ratelimit(scope, rate, key=user_or_ip, methods=('POST',)):
+    """Декоратор view, отвечающий 429 при превышении rate.
+
+    Несколько декораторов с одним scope и разными rate задают
+    ограничения на разные периоды.
+    """
+    limit, period = parse_rate(rate)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLED and request.method in methods:
+                retry_after = hit(scope, key(request), limit, period)
+                if retry_after is not None:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
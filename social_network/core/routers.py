@@ -0,0 +1,72 @@
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# После своей записи пользователь читает из основной базы столько секунд,
+# пока реплика не догонит её.
+PIN_SECONDS = 10
+PIN_COOKIE = 'pin_primary'
+
+_read_alias = ContextVar('read_alias', default=None)
+_wrote = ContextVar('wrote', default=False)
+
+
+def track_writes():
+    """Начинает учёт записей в текущем запросе."""
+    return _wrote.set(False)
+
+
+def wrote():
+    return _wrote.get()
+
+
+def reset(token):
+    _wrote.reset(token)
+
+
+def read_from_replica(view):
+    """Направляет чтения view в одну из реплик DATABASE_REPLICAS.
+
+    Пользователь, недавно писавший в базу, читает из основной, чтобы
+    видеть свои изменения.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or PIN_COOKIE in request.COOKIES:
+            return view(request, *args, **kwargs)
+        token = _read_alias.set(random.choice(replicas))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    """Запись всегда в основную базу, чтение - в реплику внутри
+    read_from_replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Схема всех баз одинакова.
+
+        Настоящие реплики получают её репликацией с основной базы,
+        локальную базу replica мигрируют отдельно:
+        python manage.py migrate --database=replica.
+        """
+        return True
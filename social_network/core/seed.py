@@ -0,0 +1,232 @@
+import io
+import json
+import random
+from collections import Counter
+from itertools import accumulate
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from posts import images, media, search, stats, timeline, trending
+from posts.models import Comment, Follow, Group, Post, User
+from posts.storage import media_storage
+
+BATCH_SIZE = 5000
+SEED_PASSWORD = 'seed-password'
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Позволяет bulk_create сохранить заданные даты auto_now_add полей."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def power_law_weights(count, alpha):
+    """Накопленные веса Ципфа: у немногих объектов большая часть связей."""
+    return list(accumulate(
+        1 / (rank ** alpha) for rank in range(1, count + 1)
+    ))
+
+
+def bulk_insert(model, objects):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Seeder:
+    """Генератор реалистичного набора данных для нагрузочных замеров."""
+
+    def __init__(self, users, groups, posts, comments, follows, images,
+                 days=365, alpha=1.1, seed=None, log=print):
+        self.counts = {
+            'users': users,
+            'groups': groups,
+            'posts': posts,
+            'comments': comments,
+            'follows': follows,
+            'images': images,
+        }
+        self.days = days
+        self.alpha = alpha
+        self.random = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(seed)
+        self.log = log
+        self.now = timezone.now()
+
+    def run(self, rebuild=True):
+        self.seed_users()
+        self.seed_groups()
+        self.seed_images()
+        self.seed_follows()
+        self.seed_posts()
+        self.seed_comments()
+        if rebuild:
+            self.log('Пересчёт производных данных')
+            stats.rebuild()
+            timeline.rebuild()
+            search.rebuild()
+            trending.rebuild()
+
+    def seed_users(self):
+        password = make_password(SEED_PASSWORD)
+        offset = User.objects.count()
+        bulk_insert(User, (
+            User(
+                username=f'{self.faker.user_name()}{offset + i}'[:150],
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                email=self.faker.email(),
+                password=password,
+            )
+            for i in range(self.counts['users'])
+        ))
+        self.user_ids = list(User.objects.values_list('pk', flat=True))
+        self.random.shuffle(self.user_ids)
+        self.user_weights = power_law_weights(
+            len(self.user_ids), self.alpha,
+        )
+        self.log(f'Пользователей: {len(self.user_ids)}')
+
+    def seed_groups(self):
+        offset = Group.objects.count()
+        bulk_insert(Group, (
+            Group(
+                title=self.faker.catch_phrase()[:200],
+                slug=f'group-{offset + i}',
+                description=self.faker.paragraph(),
+            )
+            for i in range(self.counts['groups'])
+        ))
+        self.group_ids = list(Group.objects.values_list('pk', flat=True))
+        self.log(f'Групп: {len(self.group_ids)}')
+
+    def seed_images(self):
+        """Картинки с уменьшенными копиями, как у загруженных через форму.
+
+        Копии создаются один раз на картинку, посты получают готовые поля.
+        """
+        self.images = []
+        for i in range(self.counts['images']):
+            image = Image.new('RGB', (1280, 720), tuple(
+                self.random.randrange(256) for _ in range(3)
+            ))
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=85)
+            name = media_storage.save(
+                f'posts/seed_{i}.jpg', ContentFile(buffer.getvalue()),
+            )
+            buffer.seek(0)
+            width, height, variants = images.render_variants(buffer, name)
+            self.images.append({
+                'image': name,
+                'image_width': width,
+                'image_height': height,
+                'image_variants': json.dumps(variants) if variants else '',
+            })
+        self.log(f'Картинок: {len(self.images)}')
+
+    def seed_follows(self):
+        """Граф подписок со степенным распределением популярности."""
+        def follows():
+            remaining = self.counts['follows']
+            while remaining > 0:
+                user_id = self.random.choice(self.user_ids)
+                amount = min(
+                    remaining,
+                    int(self.random.paretovariate(self.alpha)),
+                    len(self.user_ids) - 1,
+                )
+                authors = set(self.random.choices(
+                    self.user_ids, cum_weights=self.user_weights, k=amount,
+                ))
+                authors.discard(user_id)
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+                remaining -= max(amount, 1)
+        bulk_insert(Follow, follows())
+        self.log(f'Подписок: {Follow.objects.count()}')
+
+    def seed_posts(self):
+        references = Counter()
+
+        def posts():
+            authors = self.random.choices(
+                self.user_ids,
+                cum_weights=self.user_weights,
+                k=self.counts['posts'],
+            )
+            for author_id in authors:
+                image = {}
+                if self.images and self.random.random() < 0.1:
+                    image = self.random.choice(self.images)
+                    references.update(media.post_files(
+                        image['image'], image['image_variants'],
+                    ))
+                group_id = None
+                if self.group_ids and self.random.random() < 0.5:
+                    group_id = self.random.choice(self.group_ids)
+                yield Post(
+                    author_id=author_id,
+                    group_id=group_id,
+                    text=self.faker.text(self.random.randint(50, 1000)),
+                    pub_date=self._random_date(),
+                    **image,
+                )
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            bulk_insert(Post, posts())
+        # bulk_create не вызывает сигналы, ссылки на файлы учитываются тут.
+        media.acquire(references.elements())
+        self.log(f'Постов: {Post.objects.count()}')
+
+    def seed_comments(self):
+        last_post = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True,
+        ).first()
+        if last_post is None:
+            return
+        post_weights = power_law_weights(last_post, self.alpha)
+
+        def comments():
+            total = self.counts['comments']
+            for start in range(0, total, BATCH_SIZE):
+                amount = min(BATCH_SIZE, total - start)
+                post_ids = self.random.choices(
+                    range(1, last_post + 1), cum_weights=post_weights, k=amount,
+                )
+                existing = set(Post.objects.filter(
+                    pk__in=post_ids,
+                ).values_list('pk', flat=True))
+                for post_id in post_ids:
+                    if post_id not in existing:
+                        continue
+                    yield Comment(
+                        post_id=post_id,
+                        author_id=self.random.choice(self.user_ids),
+                        text=self.faker.sentence(),
+                        created=self._random_date(),
+                    )
+        with explicit_dates(Comment._meta.get_field('created')):
+            bulk_insert(Comment, comments())
+        self.log(f'Комментариев: {Comment.objects.count()}')
+
+    def _random_date(self):
+        return self.now - timedelta(
+            seconds=self.random.randrange(self.days * 24 * 60 * 60)
+        )
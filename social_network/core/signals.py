@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import backends
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    """Сбрасывает закэшированного пользователя сессии.
+
+    Вход обновляет только last_login, который не влияет на проверку
+    сессии. Новому пользователю достаточно убрать локальную копию
+    с тем же id, оставшуюся после отката транзакции.
+    """
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    if kwargs.get('created'):
+        backends.forget(instance.pk)
+        return
+    backends.invalidate(instance.pk)
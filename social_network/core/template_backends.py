@@ -0,0 +1,40 @@
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+from . import metrics
+
+_depth = ContextVar('template_depth', default=0)
+
+
+class Template(django_backend.Template):
+    """Шаблон, сообщающий время рендеринга в метрики запроса.
+
+    Учитывается только внешний рендеринг: карточки, отрисованные внутри
+    {% post_cards %}, уже входят во время шаблона страницы.
+    """
+
+    def render(self, context=None, request=None):
+        token = _depth.set(_depth.get() + 1)
+        started = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            _depth.reset(token)
+            if not _depth.get():
+                metrics.add_template_time(perf_counter() - started)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Стандартный бэкенд шаблонов с учётом времени рендеринга."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
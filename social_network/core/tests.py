@@ -1,6 +1,31 @@
+import json
+import os
+import shutil
+import tempfile
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.template import engines
+from django.test import (
+    RequestFactory, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts import cards, follow_graph, search
+from posts.constants import POSTS_PAGE
+from posts.models import (
+    Comment, FeedGeneration, Follow, Group, ImportCheckpoint, MediaFile,
+    Post, SearchTerm, TimelineEntry, User, UserStats,
+)
+from posts.storage import media_storage
+from . import backends, metrics, ratelimit, routers, warmup
+from .benchmark import BenchmarkRunner
 
 
 class ViewTestClass(TestCase):
@@ -8,3 +33,454 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class BenchmarkCommandsTest(TestCase):
+    def test_seed_and_benchmark(self):
+        """seed_data создаёт данные, run_benchmarks сохраняет замеры."""
+        with tempfile.TemporaryDirectory(dir=settings.BASE_DIR) as media:
+            with override_settings(
+                MEDIA_ROOT=media, THUMBNAIL_PREGENERATE_ASYNC=False,
+            ):
+                call_command(
+                    'seed_data', users=20, groups=2, posts=50, comments=80,
+                    follows=40, images=1, seed=1, stdout=StringIO(),
+                )
+                self.assertEqual(Post.objects.count(), 50)
+                self.assertTrue(Follow.objects.exists())
+                image_posts = Post.objects.exclude(image='')
+                post = image_posts.first()
+                self.assertTrue(media_storage.exists(post.image.name))
+                self.assertTrue(post.image_variants)
+                references = dict(MediaFile.objects.values_list(
+                    'name', 'references',
+                ))
+                self.assertEqual(
+                    references[post.image.name], image_posts.count(),
+                )
+                output = os.path.join(media, 'benchmark.json')
+                call_command(
+                    'run_benchmarks', requests=2, warmup=0, users='anon',
+                    output=output, stdout=StringIO(),
+                )
+                with open(output, encoding='utf-8') as file:
+                    report = json.load(file)
+        names = {route['name'] for route in report['routes']}
+        self.assertIn('posts:index', names)
+        self.assertIn('users:signup', names)
+        for route in report['routes']:
+            self.assertLessEqual(route['p50_ms'], route['p99_ms'])
+        self.assertEqual(
+            set(report['card_rendering']), {'include', 'stored'},
+        )
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_metrics_are_staff_only(self):
+        """Метрики доступны только сотрудникам."""
+        user = User.objects.create_user(username='TestUser')
+        self.client.force_login(user)
+        response = self.client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_metrics_export(self):
+        """Запросы учитываются в гистограммах по имени маршрута."""
+        staff = User.objects.create_user(username='TestStaff', is_staff=True)
+        self.client.get(reverse('posts:index'))
+        self.client.force_login(staff)
+        response = self.client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        body = response.content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{view="posts:index"} 1',
+            body,
+        )
+        self.assertIn(
+            'http_request_queries_bucket{view="posts:index",le="+Inf"} 1',
+            body,
+        )
+        self.assertIn(
+            'http_responses_total{view="posts:index",status="200"} 1',
+            body,
+        )
+        self.assertIn('http_request_cache_total{view="posts:index"', body)
+        self.assertRegex(
+            body,
+            r'http_request_template_duration_seconds_sum'
+            r'\{view="posts:index"\} 0\.0*[1-9]',
+        )
+
+
+    def test_nested_renders_are_counted_once(self):
+        """Карточки внутри {% post_cards %} не учитываются повторно."""
+        author = User.objects.create_user(username='TestAuthor')
+        posts = [
+            Post.objects.create(author=author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        cache.clear()
+        template = engines.all()[0].from_string(
+            '{% load post_cards %}{% post_cards posts as items %}'
+            '{% for post, card in items %}{{ card }}{% endfor %}'
+        )
+        with mock.patch.object(metrics, 'add_template_time') as add:
+            html = template.render({'posts': posts})
+        self.assertIn('Пост 2', html)
+        add.assert_called_once()
+
+
+class ImportCommandTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory(dir=settings.BASE_DIR)
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, lines):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        return path
+
+    def dump(self, broken=False):
+        records = [
+            {'type': 'group', 'slug': 'imported', 'title': 'Импорт'},
+            {'type': 'post', 'id': 1, 'author': 'alice', 'group': 'imported',
+             'text': 'Первый пост', 'pub_date': '2020-01-01T10:00:00'},
+            {'type': 'post', 'id': 2, 'author': 'bob',
+             'text': 'Второй пост', 'pub_date': '2020-01-02T10:00:00'},
+            {'type': 'follow', 'user': 'bob', 'author': 'alice'},
+            {'type': 'unknown'} if broken else {
+                'type': 'comment', 'post': 1, 'author': 'bob',
+                'text': 'Комментарий', 'created': '2020-01-03T10:00:00',
+            },
+        ]
+        return self.write('dump.ndjson', [
+            json.dumps(record, ensure_ascii=False) for record in records
+        ])
+
+    def test_import_and_rebuild(self):
+        """Импорт создаёт записи и пересчитывает производные данные."""
+        path = self.write('follows.csv', [
+            'type,user,author',
+            'follow,carol,alice',
+        ])
+        call_command(
+            'import_data', self.dump(), path, batch_size=2,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Group.objects.get().slug, 'imported')
+        alice = User.objects.get(username='alice')
+        self.assertFalse(alice.has_usable_password())
+        post = Post.objects.get(import_key='import:1')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertEqual(alice.stats.followers_count, 2)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user__username='carol').exists()
+        )
+        self.assertTrue(search.search('первый').exists())
+
+    def test_resume_after_failure(self):
+        """После сбоя импорт продолжается без дублей."""
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_data', self.dump(broken=True), batch_size=2,
+                stdout=StringIO(),
+            )
+        self.assertEqual(ImportCheckpoint.objects.get().position, 4)
+        self.assertEqual(Post.objects.count(), 2)
+        call_command(
+            'import_data', self.dump(), batch_size=2, stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_resume_resets_earlier_followers(self):
+        """Подписки из пачек до сбоя тоже сбрасывают кэш подписчиков."""
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_data', self.dump(broken=True), batch_size=2,
+                stdout=StringIO(),
+            )
+        bob = User.objects.get(username='bob')
+        alice = User.objects.get(username='alice')
+        cache.set(follow_graph.following_key(bob.pk), frozenset())
+        call_command(
+            'import_data', self.dump(), batch_size=2, stdout=StringIO(),
+        )
+        self.assertTrue(follow_graph.is_following(bob.pk, alice.pk))
+
+    def test_only_imported_posts_are_indexed(self):
+        """Импорт индексирует свои посты, не пересобирая весь индекс."""
+        author = User.objects.create_user(username='local')
+        local = Post.objects.create(author=author, text='Локальный пост')
+        SearchTerm.objects.filter(post=local).delete()
+        call_command('import_data', self.dump(), stdout=StringIO())
+        self.assertTrue(search.search('второй').exists())
+        self.assertFalse(search.search('локальный').exists())
+
+
+class RateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='TestUser')
+        self.post = Post.objects.create(author=self.user, text='Пост')
+        self.client.force_login(self.user)
+
+    def test_comment_flood_gets_429(self):
+        """Лишние комментарии отклоняются с 429 и Retry-After."""
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        for i in range(10):
+            response = self.client.post(url, {'text': f'Комментарий {i}'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.client.post(url, {'text': 'Лишний'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.count(), 10)
+        other = User.objects.create_user(username='OtherUser')
+        self.client.force_login(other)
+        response = self.client.post(url, {'text': 'Другой автор'})
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_sliding_window_counts_previous_window(self):
+        """Прошлое окно учитывается с весом оставшейся доли."""
+        def hit(now):
+            return ratelimit.hit('test', 'ip:1', 4, 64, now=now)
+
+        for _ in range(4):
+            self.assertIsNone(hit(32))
+        self.assertEqual(hit(63), 1)
+        self.assertIsNone(hit(72))
+        self.assertEqual(hit(76), 4)
+        self.assertIsNone(hit(81))
+
+    def test_client_ip_behind_trusted_proxies(self):
+        """X-Forwarded-For учитывается только от доверенных прокси."""
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR='10.0.0.1',
+            HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2, 10.0.0.2',
+        )
+        cases = (
+            ([], '10.0.0.1'),
+            (['10.0.0.0/8'], '2.2.2.2'),
+            (['10.0.0.0/8', '2.2.2.2'], '1.1.1.1'),
+            (['192.168.0.1'], '10.0.0.1'),
+        )
+        for proxies, expected in cases:
+            with self.subTest(proxies=proxies):
+                with override_settings(TRUSTED_PROXIES=proxies):
+                    self.assertEqual(ratelimit.client_ip(request), expected)
+
+    def test_benchmark_is_not_rate_limited(self):
+        """Замеры не упираются в ограничения частоты."""
+        author = User.objects.create_user(username='Author')
+        runner = BenchmarkRunner(requests=35, warmup=0, log=lambda line: None)
+        result = runner.measure(
+            'posts:profile_follow',
+            reverse('posts:profile_follow', args=(author.username,)),
+            self.user,
+        )
+        self.assertEqual(result.status, HTTPStatus.FOUND)
+
+
+class SessionCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='TestUser')
+
+    def test_warm_user_has_no_baseline_queries(self):
+        """Сессия и пользователь из кэша не дают запросов к базе."""
+        Post.objects.create(author=self.user, text='Пост')
+        runner = BenchmarkRunner(requests=1, warmup=1, log=lambda line: None)
+        result = runner.measure(
+            'users:password_change_form',
+            reverse('users:password_change_form'),
+            self.user,
+        )
+        self.assertEqual(result.status, HTTPStatus.OK)
+        self.assertEqual(result.queries, 0)
+
+    def test_user_change_invalidates_cache(self):
+        """Изменение пользователя сразу видно в следующем запросе."""
+        self.client.force_login(self.user)
+        self.client.get(reverse('posts:index'))
+        self.user.username = 'RenamedUser'
+        self.user.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['user'].username, 'RenamedUser')
+
+    def test_password_change_in_other_process_ends_session(self):
+        """Смена пароля в другом процессе сбрасывает кэш пользователя."""
+        self.client.force_login(self.user)
+        url = reverse('posts:post_create')
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.OK)
+        # Другой процесс меняет пароль и поколение в базе, локальная
+        # копия поколения истекает по таймауту.
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        User.objects.filter(pk=user.pk).update(password=user.password)
+        FeedGeneration.objects.filter(
+            key=backends.GENERATION_KEY,
+        ).update(value=F('value') + 1)
+        cache.delete(backends.GENERATION_KEY)
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.FOUND)
+
+    def test_sessions_of_model_backend_stay_valid(self):
+        """Сессии, созданные через ModelBackend, не сбрасываются."""
+        self.client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend',
+        )
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_login_survives_cache_loss(self):
+        """Сессия после входа сохранена в базе и переживает сброс кэша."""
+        self.client.force_login(self.user)
+        cache.clear()
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='TestAuthor')
+        Post.objects.create(author=self.author, text='Пост из основной базы')
+        # bulk_create без сигналов: реплика отстаёт и видит другой пост.
+        User.objects.using('replica').bulk_create([
+            User(pk=self.author.pk, username='TestAuthor'),
+        ])
+        Post.objects.using('replica').bulk_create([
+            Post(author_id=self.author.pk, text='Пост из реплики'),
+        ])
+
+    def test_feed_reads_from_replica_until_own_write(self):
+        """Лента читается из реплики, а после записи - из основной."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пост из реплики')
+        self.assertNotContains(response, 'Пост из основной базы')
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'},
+        )
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новый пост')
+        self.assertContains(response, 'Пост из основной базы')
+
+    def test_missing_stats_are_read_back_from_primary(self):
+        """Пересчитанные счётчики читаются из основной базы."""
+        UserStats.objects.filter(user=self.author).delete()
+        response = self.client.get(
+            reverse('posts:profile', args=(self.author.username,)),
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(UserStats.objects.filter(user=self.author).exists())
+
+
+class WarmCachesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {i}')
+            for i in range(POSTS_PAGE + 1)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_first_pages_are_warmed(self):
+        """Команда прогревает обе страницы главной, группы и профиля."""
+        out = StringIO()
+        call_command('warm_caches', pages=3, workers=1, stdout=out)
+        self.assertIn('Прогрето страниц: 6', out.getvalue())
+        for post in Post.objects.for_feed():
+            self.assertIsNotNone(cache.get(cards.card_key(post)))
+
+    def test_budget_stops_warmup(self):
+        """После исчерпания бюджета страницы не запрашиваются."""
+        warmer = warmup.CacheWarmer(workers=1, budget=0, log=lambda line: 0)
+        self.assertEqual(warmer.run(), 0)
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaServingTest(TestCase):
+    content = bytes(range(256)) * 4
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.name = media_storage.save(
+            'posts/file.gif', ContentFile(self.content),
+        )
+        self.url = reverse('core:media', kwargs={'path': self.name})
+
+    def test_full_file_with_cache_headers(self):
+        """Файл отдаётся целиком с ETag и кэшированием на год."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertIn('immutable', response['Cache-Control'])
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_range_requests(self):
+        """Range отдаёт часть файла, невыполнимый - 416."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(
+            b''.join(response.streaming_content), self.content[10:20],
+        )
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-4')
+        self.assertEqual(
+            b''.join(response.streaming_content), self.content[-4:],
+        )
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2000-')
+        self.assertEqual(
+            response.status_code,
+            HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+        )
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_missing_and_outside_files(self):
+        """Отсутствующие файлы и пути вне MEDIA_ROOT дают 404."""
+        for path in ('posts/missing.gif', '../settings.py', 'posts'):
+            response = self.client.get(
+                reverse('core:media', kwargs={'path': path}),
+            )
+            self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_transfer_handed_to_proxy(self):
+        """С X-Accel-Redirect тело отдаёт прокси."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'], f'/protected-media/{self.name}',
+        )
+        self.assertEqual(response.content, b'')
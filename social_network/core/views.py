@@ -1,5 +1,23 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
-from http.client import FORBIDDEN, INTERNAL_SERVER_ERROR, NOT_FOUND
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from http.client import (
+    FORBIDDEN, INTERNAL_SERVER_ERROR, NOT_FOUND, PARTIAL_CONTENT,
+    REQUESTED_RANGE_NOT_SATISFIABLE, TOO_MANY_REQUESTS,
+)
+
+from . import media, metrics
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
 
 
 def page_not_found(request, exception):
@@ -15,5 +33,96 @@ def csrf_failure(request, exception):
     return render(request, 'core/403csrf.html', status=FORBIDDEN)
 
 
+def too_many_requests(request, retry_after):
+    response = render(
+        request,
+        'core/429.html',
+        {'retry_after': retry_after},
+        status=TOO_MANY_REQUESTS,
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 def server_error(request):
     return render(request, 'core/500.html', status=INTERNAL_SERVER_ERROR)
+
+
+@staff_member_required
+def metrics_export(request):
+    """Метрики запросов в текстовом формате Prometheus."""
+    return HttpResponse(
+        metrics.render(),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
+
+
+@require_safe
+def serve_media(request, path):
+    """Файл из MEDIA_ROOT с поддержкой Range и условных запросов.
+
+    При MEDIA_SENDFILE_HEADER тело отдаёт фронт-прокси, Django только
+    проверяет файл и выставляет заголовки.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Файл не найден')
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден')
+    etag = media.etag(stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': (
+            media.IMMUTABLE_CACHE_CONTROL if media.is_immutable(path)
+            else media.CACHE_CONTROL
+        ),
+        'Accept-Ranges': 'bytes',
+    }
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime),
+    )
+    content_type = mimetypes.guess_type(full_path)[0]
+    content_type = content_type or 'application/octet-stream'
+    sendfile = media.sendfile_headers(path, full_path)
+    if response is None and sendfile:
+        response = HttpResponse(content_type=content_type)
+        headers.update(sendfile)
+    if response is None:
+        response = _file_response(
+            request, full_path, stat, etag, content_type,
+        )
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def _file_response(request, full_path, stat, etag, content_type):
+    byte_range = None
+    # Range с устаревшим If-Range игнорируется: отдаётся весь файл.
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range is None or if_range in (etag, http_date(stat.st_mtime)):
+        try:
+            byte_range = media.parse_range(
+                request.META.get('HTTP_RANGE'), stat.st_size,
+            )
+        except ValueError:
+            response = HttpResponse(status=REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        response['Content-Length'] = stat.st_size
+        return response
+    start, end = byte_range
+    response = FileResponse(
+        media.RangeFile(file, start, end),
+        content_type=content_type,
+        status=PARTIAL_CONTENT,
+    )
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return response
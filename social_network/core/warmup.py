@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import close_old_connections
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import reverse
+
+from posts.constants import POSTS_PAGE
+from posts.models import Group, Post, UserStats
+from posts.utils import CursorPaginator
+
+logger = logging.getLogger(__name__)
+
+PAGES = 3
+GROUPS = 10
+PROFILES = 10
+WORKERS = 4
+# Секунды, после которых новые страницы не запрашиваются.
+BUDGET = 30
+
+
+class CacheWarmer:
+    """Заполняет кэши запросами к первым страницам популярных лент.
+
+    Страницы проходят через WSGI-приложение, как у первого посетителя,
+    поэтому заполняются фрагменты лент, карточки постов, миниатюры,
+    оценки числа записей и счётчики профилей. Ленты обходятся
+    параллельно, страницы одной ленты - по порядку курсоров.
+    """
+
+    def __init__(self, pages=PAGES, groups=GROUPS, profiles=PROFILES,
+                 workers=WORKERS, budget=BUDGET, log=print):
+        self.pages = pages
+        self.groups = groups
+        self.profiles = profiles
+        self.workers = workers
+        self.budget = budget
+        self.log = log
+        self.application = WSGIHandler()
+        self.factory = RequestFactory()
+
+    def feeds(self):
+        """Пары (URL ленты, посты ленты), самые посещаемые первыми."""
+        yield reverse('posts:index'), Post.objects.for_feed()
+        groups = Group.objects.annotate(
+            posts_count=Count('posts'),
+        ).order_by('-posts_count')[:self.groups]
+        for group in groups:
+            yield (
+                reverse('posts:group_list', kwargs={'slug': group.slug}),
+                group.posts.for_feed(),
+            )
+        stats = UserStats.objects.select_related('user').order_by(
+            '-followers_count',
+        )[:self.profiles]
+        for row in stats:
+            yield (
+                reverse(
+                    'posts:profile', kwargs={'username': row.user.username},
+                ),
+                row.user.posts.for_feed(),
+            )
+
+    def run(self):
+        """Прогревает ленты до истечения бюджета, возвращает число страниц."""
+        deadline = time.monotonic() + self.budget
+        feeds = list(self.feeds())
+        if self.workers <= 1:
+            counts = [self.warm_feed(*feed, deadline) for feed in feeds]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='warmup',
+            ) as executor:
+                counts = list(executor.map(
+                    lambda feed: self.warm_in_worker(*feed, deadline), feeds,
+                ))
+        return sum(counts)
+
+    def warm_in_worker(self, url, post_list, deadline):
+        """Вызов warm_feed из потока со своим соединением с базой."""
+        close_old_connections()
+        try:
+            return self.warm_feed(url, post_list, deadline)
+        finally:
+            close_old_connections()
+
+    def warm_feed(self, url, post_list, deadline):
+        """Запрашивает первые страницы ленты, возвращает их число."""
+        paginator = CursorPaginator(post_list, POSTS_PAGE)
+        cursor = None
+        for number in range(self.pages):
+            if time.monotonic() >= deadline:
+                return number
+            page_url = f'{url}?after={cursor}' if cursor else url
+            status = self.request(page_url)
+            if status != HTTPStatus.OK:
+                self.log(f'{page_url}: ответ {status}, лента пропущена')
+                return number
+            self.log(f'{page_url}: прогрет')
+            cursor = paginator.page(after=cursor).next_cursor
+            if cursor is None:
+                return number + 1
+        return self.pages
+
+    def request(self, url):
+        environ = self.factory.get(url).environ
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(status)
+
+        response = self.application(environ, start_response)
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return int(statuses[0].split()[0])
+
+
+def warm_in_background(**options):
+    """Прогревает кэши процесса в фоновом потоке, не задерживая старт."""
+    def target():
+        try:
+            pages = CacheWarmer(log=logger.debug, **options).run()
+        except Exception:
+            logger.exception('Не удалось прогреть кэши')
+        else:
+            logger.info('Прогрето страниц лент: %s', pages)
+        finally:
+            close_old_connections()
+
+    thread = threading.Thread(target=target, name='warmup', daemon=True)
+    thread.start()
+    return thread
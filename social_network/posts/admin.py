@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Post, Group, Follow, Comment
 
 
@@ -18,6 +19,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по обратному индексу вместо LIKE."""
+        if not search_term:
+            return queryset, False
+        found = search.search(search_term).values('pk')
+        return queryset.filter(pk__in=found), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
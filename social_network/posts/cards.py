@@ -0,0 +1,54 @@
+import hashlib
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .constants import POST_CARD_TIMEOUT
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_key(post):
+    """Ключ карточки из всех данных, которые она выводит.
+
+    Изменение поста, имени автора или группы даёт новый ключ, поэтому
+    отдельная инвалидация не нужна: старые карточки истекают сами.
+    """
+    group = post.group
+    parts = (
+        post.pk,
+        post.updated.isoformat() if post.updated else '',
+        post.author.username,
+        post.author.get_full_name(),
+        group.slug if group else '',
+        group.title if group else '',
+        post.image.name or '',
+        post.image_width or '',
+        post.image_variants,
+    )
+    digest = hashlib.md5('\x1f'.join(map(str, parts)).encode()).hexdigest()
+    return f'post_card:{post.pk}:{digest}'
+
+
+def render(post):
+    return render_to_string(CARD_TEMPLATE, {'post': post})
+
+
+def render_many(posts):
+    """Пары (пост, HTML карточки): из кэша одним get_many, недостающие
+    рендерятся и сохраняются.
+    """
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cached = cache.get_many(keys)
+    rendered = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = render(post)
+        cards.append((post, mark_safe(html)))
+    if rendered:
+        cache.set_many(rendered, POST_CARD_TIMEOUT)
+    return cards
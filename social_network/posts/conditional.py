@@ -0,0 +1,105 @@
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from . import feed_cache
+from .models import Group, Post, User
+
+
+def conditional(freshness):
+    """Отвечает 304, если страница не менялась с прошлого визита клиента.
+
+    freshness по аргументам view дёшево возвращает время последнего
+    изменения содержимого и части ETag либо None, если объекта нет.
+    ETag учитывает поколения кэша, пользователя и его CSRF-cookie, поэтому
+    кнопки подписки, ссылки редактирования и формы не устаревают.
+    Last-Modified отдаётся только анонимам: у них страница общая.
+    Полное имя view различает одноимённые страницы сайта и API.
+    """
+    def decorator(view):
+        name = f'{view.__module__}.{view.__qualname__}'
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            state = freshness(*args, **kwargs)
+            if state is None:
+                return view(request, *args, **kwargs)
+            changed, parts = state
+            user = request.user
+            etag = quote_etag(hashlib.md5(repr((
+                name,
+                parts,
+                feed_cache.generation(),
+                feed_cache.generation(feed_cache.SOCIAL_GENERATION_KEY),
+                user.pk,
+                request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+                request.GET.urlencode(),
+            )).encode()).hexdigest())
+            last_modified = None
+            if not user.is_authenticated:
+                changed = max(filter(None, (
+                    changed,
+                    feed_cache.changed_at(),
+                    feed_cache.changed_at(feed_cache.SOCIAL_GENERATION_KEY),
+                )))
+                last_modified = timegm(changed.utctimetuple())
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified,
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return inner
+    return decorator
+
+
+def index_freshness():
+    """Дата последнего поста общей ленты."""
+    latest = Post.objects.aggregate(latest=Max('pub_date'))['latest']
+    return latest, ()
+
+
+def group_freshness(slug):
+    """Дата последнего поста группы."""
+    row = Group.objects.filter(slug=slug).values('pk').annotate(
+        latest=Max('posts__pub_date'),
+    ).values_list('pk', 'latest').first()
+    if row is None:
+        return None
+    return row[1], row
+
+
+def profile_freshness(username):
+    """Дата последнего поста автора."""
+    row = User.objects.filter(username=username).values('pk').annotate(
+        latest=Max('posts__pub_date'),
+    ).values_list('pk', 'latest').first()
+    if row is None:
+        return None
+    return row[1], row
+
+
+def post_freshness(post_id):
+    """Время правки поста или его последнего комментария."""
+    row = Post.objects.filter(pk=post_id).order_by().values(
+        'updated',
+    ).annotate(
+        last_comment=Max('comments__created'),
+    ).values_list('updated', 'last_comment').first()
+    if row is None:
+        return None
+    return max(filter(None, row)), row
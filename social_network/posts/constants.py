@@ -1,2 +1,50 @@
 POSTS_PAGE = 10
 POSTS_SYMBOLS = 15
+TIMELINE_BATCH_SIZE = 1000
+PAGE_WINDOW = 3
+FEED_ORDERING = ('-pub_date', '-pk')
+# Лента подписок сортируется по полям TimelineEntry, чтобы читать
+# индекс timeline_user_pub_date_idx без сортировки.
+TIMELINE_ORDERING = ('-feed_date', '-feed_post')
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+# Поколение хранится в базе, кэш процесса лишь сглаживает чтения:
+# изменение из другого процесса видно не позже чем через это время.
+GENERATION_CACHE_TIMEOUT = 5
+GENERATION_KEY_LENGTH = 64
+POST_CARD_TIMEOUT = 60 * 60 * 24
+# Записи сбрасывают страницы сразу, таймаут ограничивает прочее,
+# например смену имени автора.
+PAGE_CACHE_TIMEOUT = 60 * 10
+# Геометрии должны совпадать с тегами thumbnail в шаблонах.
+THUMBNAIL_GEOMETRIES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_URL_TIMEOUT = 60 * 60 * 24 * 7
+THUMBNAIL_PENDING_TIMEOUT = 60
+# Больший размер оригинала уменьшается при загрузке.
+IMAGE_MAX_SIZE = 1920
+IMAGE_VARIANT_WIDTHS = (480, 960)
+IMAGE_JPEG_QUALITY = 85
+IMAGE_WEBP_QUALITY = 80
+SEARCH_TERM_LENGTH = 64
+SEARCH_MIN_TERM_LENGTH = 2
+SEARCH_POST_WEIGHT = 3
+SEARCH_COMMENT_WEIGHT = 1
+FOLLOW_GRAPH_TIMEOUT = 60 * 60
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_STORED = 50
+RECOMMENDATION_MUTUAL_WEIGHT = 1.0
+RECOMMENDATION_ACTIVITY_WEIGHT = 0.1
+RECOMMENDATION_ACTIVITY_CAP = 30
+RECOMMENDATION_ACTIVITY_DAYS = 30
+# Больше подписчиков обрабатывает только периодический пересчёт.
+RECOMMENDATION_FANOUT_LIMIT = 10000
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_KEY_LENGTH = 255
+# Через TRENDING_HALF_LIFE секунд вес события уменьшается вдвое.
+TRENDING_HALF_LIFE = 60 * 60 * 6
+TRENDING_COMMENT_WEIGHT = 1.0
+# Записи слабее одного комментария двухсуточной давности удаляются.
+TRENDING_MIN_SCORE = 2 ** -8
+TRENDING_REBUILD_DAYS = 7
@@ -0,0 +1,131 @@
+import csv
+import json
+import logging
+import zipfile
+
+from .constants import EXPORT_CHUNK_SIZE
+from .models import Comment, Post
+from .storage import media_storage
+
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = ('type', 'id', 'post', 'group', 'date', 'image', 'text')
+
+
+def records(user):
+    """Посты и комментарии пользователя словарями, без загрузки всех сразу."""
+    posts = Post.objects.filter(author=user).order_by('pk').values(
+        'pk', 'text', 'pub_date', 'group__slug', 'image',
+    )
+    for row in posts.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'type': 'post',
+            'id': row['pk'],
+            'text': row['text'],
+            'pub_date': row['pub_date'].isoformat(),
+            'group': row['group__slug'],
+            'image': row['image'] or None,
+        }
+    comments = Comment.objects.filter(author=user).order_by('pk').values(
+        'pk', 'post_id', 'text', 'created',
+    )
+    for row in comments.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'type': 'comment',
+            'id': row['pk'],
+            'post': row['post_id'],
+            'text': row['text'],
+            'created': row['created'].isoformat(),
+        }
+
+
+def ndjson_lines(user):
+    """Выгрузка в формате NDJSON: одна запись в строке."""
+    for record in records(user):
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """Файл для csv.writer, возвращающий строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(user):
+    """Выгрузка в формате CSV с общими колонками для постов и комментариев."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for record in records(user):
+        yield writer.writerow((
+            record['type'],
+            record['id'],
+            record.get('post', ''),
+            record.get('group') or '',
+            record.get('pub_date') or record.get('created'),
+            record.get('image') or '',
+            record['text'],
+        ))
+
+
+class _StreamBuffer:
+    """Файл без seek для zipfile, отдающий записанные байты частями."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def zip_chunks(user):
+    """Zip-архив с data.ndjson и картинками, собираемый на лету."""
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('data.ndjson', 'w') as entry:
+            for line in ndjson_lines(user):
+                entry.write(line.encode())
+                yield from _drain(buffer)
+        # Одинаковые картинки в хранилище с дедупликацией - один файл.
+        images = Post.objects.filter(author=user).exclude(image='').order_by(
+            'image',
+        ).values_list('image', flat=True).distinct()
+        for name in images.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            try:
+                source = media_storage.open(name)
+            except OSError:
+                logger.warning('Картинка %s не найдена для выгрузки', name)
+                continue
+            # Картинки уже сжаты, поэтому сохраняются без компрессии.
+            with source, archive.open(zipfile.ZipInfo(name), 'w') as entry:
+                for chunk in source.chunks():
+                    entry.write(chunk)
+                    yield from _drain(buffer)
+    yield from _drain(buffer)
+
+
+def _drain(buffer):
+    data = buffer.pop()
+    if data:
+        yield data
+
+
+FORMATS = {
+    'ndjson': ('application/x-ndjson; charset=utf-8', ndjson_lines),
+    'csv': ('text/csv; charset=utf-8', csv_lines),
+    'zip': ('application/zip', zip_chunks),
+}
@@ -0,0 +1,68 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .constants import FEED_CACHE_TIMEOUT, GENERATION_CACHE_TIMEOUT
+from .models import FeedGeneration
+from .utils import PAGE_PARAMS
+
+GENERATION_KEY = 'feed:generation'
+SOCIAL_GENERATION_KEY = 'feed:social_generation'
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def generation(key=GENERATION_KEY):
+    """Текущее поколение кэша лент.
+
+    Поколение хранит время последнего изменения в миллисекундах, поэтому
+    по нему же строится заголовок Last-Modified. Источник истины -
+    строка FeedGeneration в основной базе, общая для всех процессов и
+    команд управления; кэш лишь избавляет от запроса на каждый вызов.
+    """
+    value = cache.get(key)
+    if value is None:
+        row, _ = FeedGeneration.objects.using(
+            DEFAULT_DB_ALIAS,
+        ).get_or_create(key=key, defaults={'value': _now_ms()})
+        value = row.value
+        cache.set(key, value, GENERATION_CACHE_TIMEOUT)
+    return value
+
+
+def bump(key=GENERATION_KEY):
+    """Делает устаревшими все закэшированные фрагменты лент."""
+    now = _now_ms()
+    updated = FeedGeneration.objects.filter(key=key).update(
+        value=Greatest(Value(now), F('value') + 1),
+    )
+    if not updated:
+        FeedGeneration.objects.get_or_create(
+            key=key, defaults={'value': now},
+        )
+    cache.delete(key)
+
+
+def bump_social():
+    """Отмечает изменение подписок, счётчиков или рекомендаций."""
+    bump(SOCIAL_GENERATION_KEY)
+
+
+def changed_at(key=GENERATION_KEY):
+    """Время смены поколения."""
+    return datetime.fromtimestamp(generation(key) / 1000, timezone.utc)
+
+
+def feed_cache_context(request, scope):
+    """Контекст для тега cache: таймаут и ключ страницы ленты."""
+    page = ':'.join(request.GET.get(param, '') for param in PAGE_PARAMS)
+    return {
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
+        'feed_cache_key': f'{generation()}:{scope}:{page}',
+    }
@@ -0,0 +1,35 @@
+from django.core.cache import cache
+
+from . import feed_cache
+from .constants import FOLLOW_GRAPH_TIMEOUT
+from .models import Follow
+
+FOLLOWING_KEY = 'follow_graph:following:{}:{}'
+
+
+def following_key(user_id):
+    """Ключ множества подписок пользователя.
+
+    Подписки меняют общее поколение в базе, поэтому старые множества
+    перестают читаться во всех процессах, а не только в том, который
+    обработал подписку.
+    """
+    generation = feed_cache.generation(feed_cache.SOCIAL_GENERATION_KEY)
+    return FOLLOWING_KEY.format(generation, user_id)
+
+
+def following_ids(user_id):
+    """Множество id авторов, на которых подписан пользователь."""
+    key = following_key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Follow.objects.filter(
+            user_id=user_id,
+        ).values_list('author_id', flat=True))
+        cache.set(key, ids, FOLLOW_GRAPH_TIMEOUT)
+    return ids
+
+
+def is_following(user_id, author_id):
+    """Подписан ли пользователь на автора."""
+    return author_id in following_ids(user_id)
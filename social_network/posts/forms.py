@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from . import images
 from .models import Post, Comment
 
 
@@ -15,6 +17,13 @@ class PostForm(forms.ModelForm):
 
         return data
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            return images.ingest(image)
+
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,152 @@
+import io
+import json
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps, features
+
+from . import media
+from .constants import (
+    IMAGE_JPEG_QUALITY, IMAGE_MAX_SIZE, IMAGE_VARIANT_WIDTHS,
+    IMAGE_WEBP_QUALITY,
+)
+from .models import Post
+from .storage import media_storage
+
+VARIANTS_DIR = 'posts/variants'
+# Поддержка WebP зависит от сборки Pillow.
+WEBP_SUPPORTED = features.check('webp')
+# Форматы, которые пересохраняются в другом: MPO - стереопара,
+# основной кадр которой является обычным JPEG.
+INGEST_FORMATS = {'MPO': 'JPEG'}
+# Этот формат получают картинки, которые Pillow не умеет записывать.
+INGEST_FALLBACK_FORMAT = 'PNG'
+INGEST_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png'}
+
+
+def ingest(uploaded):
+    """Уменьшает загруженную картинку, убирает EXIF и пережимает её.
+
+    Формат и имя файла сохраняются, кроме форматов из INGEST_FORMATS
+    и тех, что Pillow не записывает. Анимированные картинки остаются
+    как есть: Pillow пересохранил бы только первый кадр.
+    """
+    uploaded.seek(0)
+    image = Image.open(uploaded)
+    if (
+        getattr(image, 'is_animated', False)
+        and image.format not in INGEST_FORMATS
+    ):
+        uploaded.seek(0)
+        return uploaded
+    image_format = INGEST_FORMATS.get(image.format, image.format)
+    if image_format not in Image.SAVE:
+        image_format = INGEST_FALLBACK_FORMAT
+    name, content_type = uploaded.name, uploaded.content_type
+    if image_format != image.format:
+        stem, extension = os.path.splitext(name)
+        if Image.registered_extensions().get(
+            extension.lower(),
+        ) != image_format:
+            name = stem + INGEST_EXTENSIONS[image_format]
+        content_type = Image.MIME[image_format]
+    image = ImageOps.exif_transpose(image)
+    # Писатели PNG и других форматов берут EXIF из info сами.
+    image.info.pop('exif', None)
+    image.thumbnail((IMAGE_MAX_SIZE, IMAGE_MAX_SIZE))
+    options = {}
+    if image.info.get('icc_profile'):
+        options['icc_profile'] = image.info['icc_profile']
+    if image_format == 'JPEG':
+        image = _flatten(image)
+        options.update(quality=IMAGE_JPEG_QUALITY, optimize=True)
+    elif image.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type)
+
+
+def create_variants(post):
+    """Создаёт уменьшенные копии картинки поста для srcset.
+
+    Размеры оригинала и список копий сохраняются в посте, поэтому
+    шаблонам не нужно открывать файлы. Для анимированных картинок
+    копии не создаются.
+    """
+    stale = media.post_files(None, post.image_variants)
+    if not post.image:
+        _save(post, None, None, [])
+        media.release(stale)
+        return
+    with post.image.open('rb') as file:
+        width, height, variants = render_variants(file, post.image.name)
+    media.acquire(variant['name'] for variant in variants)
+    media.release(stale)
+    _save(post, width, height, variants)
+
+
+def render_variants(file, name):
+    """Размеры картинки и сохранённые в хранилище уменьшенные копии.
+
+    Счётчики ссылок на копии не меняются: это делает вызывающий код.
+    """
+    image = Image.open(file)
+    animated = getattr(image, 'is_animated', False)
+    image = ImageOps.exif_transpose(image)
+    image.load()
+    width, height = image.size
+    if animated:
+        # Копии содержали бы только первый кадр, отдаётся оригинал.
+        return width, height, []
+    stem = os.path.splitext(os.path.basename(name))[0]
+    flat = _flatten(image)
+    variants = []
+    formats = [('jpeg', 'JPEG', {'quality': IMAGE_JPEG_QUALITY})]
+    if WEBP_SUPPORTED:
+        formats.append(('webp', 'WEBP', {'quality': IMAGE_WEBP_QUALITY}))
+    for extension, image_format, options in formats:
+        widths = [size for size in IMAGE_VARIANT_WIDTHS if size < width]
+        if image_format == 'WEBP':
+            widths.append(width)
+        for variant_width in widths:
+            variant_height = max(round(height * variant_width / width), 1)
+            resized = flat.resize(
+                (variant_width, variant_height), Image.LANCZOS,
+            )
+            buffer = io.BytesIO()
+            resized.save(buffer, image_format, **options)
+            variant_name = media_storage.save(
+                f'{VARIANTS_DIR}/{stem}_{variant_width}.{extension}',
+                ContentFile(buffer.getvalue()),
+            )
+            variants.append({
+                'name': variant_name,
+                'format': extension,
+                'width': variant_width,
+                'height': variant_height,
+            })
+    return width, height, variants
+
+
+def _save(post, width, height, variants):
+    post.image_width = width
+    post.image_height = height
+    post.image_variants = json.dumps(variants) if variants else ''
+    # UPDATE без save: сигналы поста уже отработали при сохранении.
+    Post.objects.filter(pk=post.pk).update(
+        image_width=width,
+        image_height=height,
+        image_variants=post.image_variants,
+    )
+
+
+def _flatten(image):
+    """RGB-копия картинки, прозрачность заменяется белым фоном."""
+    if image.mode in ('RGB', 'L'):
+        return image
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты и комментарии пользователя потоком.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--format',
+            choices=tuple(export.FORMATS),
+            default='ndjson',
+            help='Формат выгрузки.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки, по умолчанию stdout (кроме zip).',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден.')
+        export_format = options['format']
+        stream = export.FORMATS[export_format][1](user)
+        if options['output'] is None:
+            if export_format == 'zip':
+                raise CommandError('Для zip укажите --output.')
+            for chunk in stream:
+                self.stdout.write(chunk, ending='')
+            return
+        if export_format == 'zip':
+            file = open(options['output'], 'wb')
+        else:
+            file = open(options['output'], 'w', encoding='utf-8', newline='')
+        with file:
+            for chunk in stream:
+                file.write(chunk)
+        self.stdout.write(
+            self.style.SUCCESS(f'Выгрузка сохранена: {options["output"]}')
+        )
@@ -0,0 +1,87 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import media
+from posts.models import Post
+from posts.storage import is_content_addressed, media_storage
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов в хранилище с именами по хэшу '
+        'содержимого и обновляет пути в базе пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--keep-old',
+            action='store_true',
+            help='Не удалять старые файлы после переноса.',
+        )
+
+    def handle(self, *args, **options):
+        moved = {}
+        last_pk = 0
+        processed = 0
+        total = 0
+        while True:
+            posts = list(Post.objects.filter(
+                pk__gt=last_pk,
+            ).exclude(image='').order_by('pk').values_list(
+                'pk', 'image', 'image_variants',
+            )[:options['batch_size']])
+            if not posts:
+                break
+            last_pk = posts[-1][0]
+            processed += len(posts)
+            with transaction.atomic():
+                for pk, image, image_variants in posts:
+                    total += self.migrate_post(
+                        pk, image, image_variants, moved,
+                    )
+            self.stdout.write(
+                f'Обработано постов: {processed}, перенесено: {total}'
+            )
+        if not options['keep_old']:
+            self.delete_old(moved)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено постов: {total}, файлов: {len(moved)}'
+        ))
+
+    def migrate_post(self, pk, image, image_variants, moved):
+        variants = json.loads(image_variants) if image_variants else []
+        old_names = [image] + [variant['name'] for variant in variants]
+        if all(is_content_addressed(name) for name in old_names):
+            return 0
+        new_image = self.move(image, moved)
+        for variant in variants:
+            variant['name'] = self.move(variant['name'], moved)
+        new_names = [new_image] + [variant['name'] for variant in variants]
+        Post.objects.filter(pk=pk).update(
+            image=new_image,
+            image_variants=json.dumps(variants) if variants else '',
+        )
+        # Ссылки на уже перенесённые ранее файлы учтены при загрузке.
+        media.acquire(
+            new for old, new in zip(old_names, new_names) if old != new
+        )
+        return 1
+
+    def move(self, name, moved):
+        """Копирует файл в новое хранилище, каждый файл один раз."""
+        if is_content_addressed(name):
+            return name
+        if name not in moved:
+            with media_storage.open(name) as file:
+                moved[name] = media_storage.save(name, file)
+        return moved[name]
+
+    def delete_old(self, moved):
+        for name in moved:
+            if not Post.objects.filter(image=name).exists():
+                media_storage.delete(name)
@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.constants import THUMBNAIL_WORKERS
+from posts.models import Post
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для уже загруженных картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=THUMBNAIL_WORKERS,
+            help='Количество потоков генерации, 0 - в текущем потоке.',
+        )
+
+    def handle(self, *args, **options):
+        images = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True,
+        ).distinct()
+        total = 0
+        if not options['workers']:
+            for image_name in images.iterator():
+                thumbnails.generate(image_name)
+                total += 1
+        else:
+            with ThreadPoolExecutor(options['workers']) as executor:
+                # executor.map забирает весь итератор сразу, поэтому пачками.
+                for batch in self._batches(images.iterator(), BATCH_SIZE):
+                    list(executor.map(thumbnails.generate_in_worker, batch))
+                    total += len(batch)
+                    self.stdout.write(f'Обработано картинок: {total}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано картинок: {total}')
+        )
+
+    @staticmethod
+    def _batches(iterable, size):
+        batch = []
+        for item in iterable:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
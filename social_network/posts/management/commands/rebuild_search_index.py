@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+from posts.models import SearchTerm
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс постов.'
+
+    def handle(self, *args, **options):
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в индексе: {SearchTerm.objects.count()}'
+        ))
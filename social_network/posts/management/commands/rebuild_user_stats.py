@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed_cache, stats
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов и подписок пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help='Пользователи для пересчёта, по умолчанию все.',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['usernames']:
+            user_ids = list(User.objects.filter(
+                username__in=options['usernames'],
+            ).values_list('pk', flat=True))
+        fixed = stats.rebuild(user_ids)
+        if fixed:
+            feed_cache.bump_social()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено записей: {fixed}')
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed_cache, recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Полностью пересчитывает рекомендации авторов. '
+        'Запускается периодически, например из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Количество процессов, по умолчанию по числу ядер.',
+        )
+
+    def handle(self, *args, **options):
+        total = recommendations.recompute(
+            workers=options['workers'], log=self.stdout.write,
+        )
+        feed_cache.bump_social()
+        self.stdout.write(
+            self.style.SUCCESS(f'Рекомендаций: {total}')
+        )
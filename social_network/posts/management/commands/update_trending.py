@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит точку отсчёта популярности постов и удаляет угасшие '
+        'записи. Запускается периодически, например раз в час.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Пересчитать популярность по комментариям заново.',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = trending.rebuild()
+            message = f'Пересчитано постов: {count}'
+        else:
+            count = trending.renormalize()
+            message = f'Удалено угасших записей: {count}'
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,69 @@
+import json
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import MediaFile
+from .storage import media_storage
+
+
+def post_files(image, image_variants):
+    """Имена файлов поста: картинка и её уменьшенные копии."""
+    names = [image] if image else []
+    if image_variants:
+        names.extend(variant['name'] for variant in json.loads(image_variants))
+    return names
+
+
+def acquire(names):
+    """Увеличивает счётчики ссылок на файлы."""
+    counts = Counter(name for name in names if name)
+    if not counts:
+        return
+    MediaFile.objects.bulk_create(
+        (MediaFile(name=name) for name in counts), ignore_conflicts=True,
+    )
+    for count, group in _by_count(counts).items():
+        MediaFile.objects.filter(name__in=group).update(
+            references=F('references') + count,
+        )
+
+
+def release(names):
+    """Уменьшает счётчики и удаляет после коммита файлы без ссылок.
+
+    Файлы, которых нет в MediaFile (сохранённые до появления счётчиков),
+    никогда не удаляются.
+    """
+    counts = Counter(name for name in names if name)
+    if not counts:
+        return
+    for count, group in _by_count(counts).items():
+        MediaFile.objects.filter(name__in=group).update(
+            references=F('references') - count,
+        )
+    orphans = MediaFile.objects.filter(
+        name__in=counts, references__lte=0,
+    )
+    names = list(orphans.values_list('name', flat=True))
+    if names:
+        orphans.delete()
+        transaction.on_commit(lambda: _delete_files(names))
+
+
+def _delete_files(names):
+    # Файл могли загрузить заново между удалением записи и коммитом.
+    alive = set(MediaFile.objects.filter(
+        name__in=names,
+    ).values_list('name', flat=True))
+    for name in names:
+        if name not in alive:
+            media_storage.delete(name)
+
+
+def _by_count(counts):
+    groups = {}
+    for name, count in counts.items():
+        groups.setdefault(count, []).append(name)
+    return groups
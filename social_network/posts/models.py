@@ -1,7 +1,14 @@
+import json
+
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
 
-from .constants import POSTS_SYMBOLS
+from .constants import (
+    GENERATION_KEY_LENGTH, IMPORT_KEY_LENGTH, POSTS_SYMBOLS,
+    SEARCH_TERM_LENGTH,
+)
+from .storage import media_storage
 
 User = get_user_model()
 
@@ -28,6 +35,14 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    """QuerySet постов."""
+
+    def for_feed(self):
+        """Посты со связанными объектами, которые выводит карточка."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     """Модель Post."""
     text = models.TextField(
@@ -38,6 +53,10 @@ class Post(models.Model):
         verbose_name="Дата публикации",
         auto_now_add=True,
     )
+    updated = models.DateTimeField(
+        verbose_name="Дата изменения",
+        auto_now=True,
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -57,18 +76,86 @@ class Post(models.Model):
     image = models.ImageField(
         verbose_name='Картинка',
         upload_to='posts/',
+        storage=media_storage,
+        blank=True,
+    )
+    image_width = models.PositiveIntegerField(
+        verbose_name="Ширина картинки",
+        null=True,
         blank=True,
+        editable=False,
     )
+    image_height = models.PositiveIntegerField(
+        verbose_name="Высота картинки",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    image_variants = models.TextField(
+        verbose_name="Уменьшенные копии картинки",
+        blank=True,
+        default='',
+        editable=False,
+        help_text="JSON со списком копий: имя, формат, ширина, высота",
+    )
+    import_key = models.CharField(
+        verbose_name="Ключ импорта",
+        max_length=IMPORT_KEY_LENGTH,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Источник и id поста в импортированном дампе",
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = (
+            models.Index(
+                fields=('-pub_date',),
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date'),
+                name='post_group_pub_date_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         """Метод возвращает первые 15 символов поста."""
         return self.text[:POSTS_SYMBOLS]
 
+    @cached_property
+    def variants(self):
+        """Уменьшенные копии картинки из image_variants."""
+        return json.loads(self.image_variants) if self.image_variants else []
+
+    @property
+    def image_srcset(self):
+        """srcset из JPEG-копий и оригинала."""
+        sources = [
+            f'{self.image.storage.url(variant["name"])} {variant["width"]}w'
+            for variant in self.variants if variant['format'] == 'jpeg'
+        ]
+        sources.append(f'{self.image.url} {self.image_width}w')
+        return ', '.join(sources)
+
+    @property
+    def image_webp_srcset(self):
+        """srcset из WebP-копий, пустой без поддержки WebP."""
+        return ', '.join(
+            f'{self.image.storage.url(variant["name"])} {variant["width"]}w'
+            for variant in self.variants if variant['format'] == 'webp'
+        )
+
 
 class Comment(models.Model):
     """Модель Comment."""
@@ -95,6 +182,14 @@ class Comment(models.Model):
         auto_now_add=True,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('post', 'created'),
+                name='comment_post_created_idx',
+            ),
+        )
+
 
 class Follow(models.Model):
     """Модель подписок."""
@@ -112,3 +207,254 @@ class Follow(models.Model):
         blank=True,
         null=True,
     )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        )
+
+
+class UserStats(models.Model):
+    """Модель денормализованных счётчиков пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name="Пользователь",
+    )
+    posts_count = models.IntegerField(
+        verbose_name="Всего постов",
+        default=0,
+    )
+    followers_count = models.IntegerField(
+        verbose_name="Всего подписчиков",
+        default=0,
+    )
+    following_count = models.IntegerField(
+        verbose_name="Всего подписок",
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self) -> str:
+        """Метод выводит имя пользователя."""
+        return str(self.user_id)
+
+
+class TimelineEntry(models.Model):
+    """Модель материализованной ленты подписок."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name="Читатель",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name="Пост",
+    )
+    pub_date = models.DateTimeField(
+        verbose_name="Дата публикации",
+    )
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx',
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry',
+            ),
+        )
+
+
+class SearchTerm(models.Model):
+    """Модель обратного индекса для поиска по постам."""
+    term = models.CharField(
+        verbose_name="Слово",
+        max_length=SEARCH_TERM_LENGTH,
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name="Пост",
+    )
+    weight = models.IntegerField(
+        verbose_name="Вес",
+        default=1,
+    )
+
+    class Meta:
+        verbose_name = 'Слово индекса'
+        verbose_name_plural = 'Слова индекса'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('term', 'post'),
+                name='unique_search_term',
+            ),
+        )
+
+
+class Recommendation(models.Model):
+    """Модель рекомендаций авторов для подписки."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name="Пользователь",
+    )
+    candidate = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommended_to',
+        verbose_name="Рекомендуемый автор",
+    )
+    mutual_count = models.IntegerField(
+        verbose_name="Общих подписок",
+        default=0,
+    )
+    score = models.FloatField(
+        verbose_name="Рейтинг",
+        default=0,
+    )
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        indexes = (
+            models.Index(
+                fields=('user', '-score'),
+                name='recommendation_user_score_idx',
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'candidate'),
+                name='unique_recommendation',
+            ),
+        )
+
+
+class ImportCheckpoint(models.Model):
+    """Модель позиции импорта дампа для продолжения после сбоя."""
+    source = models.CharField(
+        verbose_name="Источник",
+        max_length=IMPORT_KEY_LENGTH,
+        unique=True,
+    )
+    position = models.PositiveIntegerField(
+        verbose_name="Обработано записей",
+        default=0,
+    )
+    updated = models.DateTimeField(
+        verbose_name="Дата изменения",
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'Позиция импорта'
+        verbose_name_plural = 'Позиции импорта'
+
+    def __str__(self) -> str:
+        """Метод выводит источник и позицию."""
+        return f'{self.source}: {self.position}'
+
+
+class FeedGeneration(models.Model):
+    """Модель поколения кэша лент, общего для всех процессов."""
+    key = models.CharField(
+        verbose_name="Ключ",
+        max_length=GENERATION_KEY_LENGTH,
+        unique=True,
+    )
+    value = models.BigIntegerField(
+        verbose_name="Время изменения, мс",
+    )
+
+    class Meta:
+        verbose_name = 'Поколение кэша'
+        verbose_name_plural = 'Поколения кэша'
+
+    def __str__(self) -> str:
+        """Метод выводит ключ и поколение."""
+        return f'{self.key}: {self.value}'
+
+
+class MediaFile(models.Model):
+    """Модель счётчика ссылок на файл в хранилище с дедупликацией."""
+    name = models.CharField(
+        verbose_name="Имя файла",
+        max_length=255,
+        unique=True,
+    )
+    references = models.IntegerField(
+        verbose_name="Число ссылок",
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Файл хранилища'
+        verbose_name_plural = 'Файлы хранилища'
+
+    def __str__(self) -> str:
+        """Метод выводит имя файла."""
+        return self.name
+
+
+class PostTrend(models.Model):
+    """Модель популярности поста с затуханием по времени.
+
+    Вес события растёт экспоненциально от точки отсчёта TrendingEpoch,
+    поэтому порядок по score совпадает с порядком по затухшей сумме.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend',
+        verbose_name="Пост",
+    )
+    score = models.FloatField(
+        verbose_name="Популярность",
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Популярность поста'
+        verbose_name_plural = 'Популярность постов'
+        indexes = (
+            models.Index(fields=('-score',), name='post_trend_score_idx'),
+        )
+
+    def __str__(self) -> str:
+        """Метод выводит id поста и популярность."""
+        return f'{self.post_id}: {self.score}'
+
+
+class TrendingEpoch(models.Model):
+    """Модель точки отсчёта весов популярности, единственная запись."""
+    started = models.DateTimeField(
+        verbose_name="Начало отсчёта",
+    )
+
+    class Meta:
+        verbose_name = 'Точка отсчёта популярности'
+        verbose_name_plural = 'Точки отсчёта популярности'
@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+from . import feed_cache
+from .constants import PAGE_CACHE_TIMEOUT
+
+try:
+    import brotli
+except ImportError:
+    # brotli есть в requirements.txt; без него страницы хранятся
+    # только в gzip.
+    brotli = None
+
+# Кодировки в порядке предпочтения.
+ENCODINGS = ('br', 'gzip')
+
+
+def anonymous_page_cache(view):
+    """Кэширует страницу для анонимов вместе с её сжатыми копиями.
+
+    gzip и brotli считаются один раз при сохранении, клиент получает
+    лучшую из принятых им кодировок. Ключ включает поколения кэша лент,
+    поэтому записи постов, комментариев и подписок сбрасывают страницы.
+    Авторизованные пользователи, страницы с CSRF-токеном и ответы с
+    cookie в кэш не попадают.
+    """
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+        ):
+            return view(request, *args, **kwargs)
+        key = page_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if not cacheable(request, response):
+                return response
+            entry = {
+                'headers': dict(response.items()),
+                'bodies': compress(response.content),
+            }
+            cache.set(key, entry, PAGE_CACHE_TIMEOUT)
+        return respond(request, entry)
+    return inner
+
+
+def page_key(request):
+    # Без хоста: страницы, прогретые core.warmup через RequestFactory,
+    # должны совпадать с запросами к настоящему домену.
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    social = feed_cache.generation(feed_cache.SOCIAL_GENERATION_KEY)
+    return f'page:{feed_cache.generation()}:{social}:{digest}'
+
+
+def cacheable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def compress(content):
+    """Тело страницы без сжатия и во всех доступных кодировках."""
+    bodies = {
+        'identity': content,
+        'gzip': gzip.compress(content, compresslevel=9, mtime=0),
+    }
+    if brotli is not None:
+        bodies['br'] = brotli.compress(content)
+    return bodies
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def respond(request, entry):
+    headers = entry['headers']
+    response = get_conditional_response(
+        request,
+        etag=headers.get('ETag'),
+        last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+    )
+    if response is None:
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+        )
+        encoding = next((
+            coding for coding in ENCODINGS
+            if coding in entry['bodies']
+            and (coding in accepted or '*' in accepted)
+        ), 'identity')
+        body = entry['bodies'][encoding]
+        response = HttpResponse(body)
+        for header, value in headers.items():
+            response[header] = value
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+        response['Content-Length'] = len(body)
+    else:
+        for header in ('ETag', 'Last-Modified', 'Vary'):
+            if header in headers:
+                response[header] = headers[header]
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,60 @@
+"""Ранжирование рекомендаций без обращения к базе.
+
+Модуль не импортирует Django, чтобы его функции можно было выполнять
+в дочерних процессах пула.
+"""
+import heapq
+from collections import Counter
+
+_following = {}
+_activity = {}
+_settings = {}
+
+
+def score(mutual_count, activity, mutual_weight, activity_weight,
+          activity_cap):
+    """Рейтинг кандидата по общим подпискам и активности автора."""
+    return (
+        mutual_count * mutual_weight
+        + min(activity, activity_cap) * activity_weight
+    )
+
+
+def init_worker(following, activity, settings):
+    """Передаёт граф подписок в процесс пула один раз."""
+    _following.clear()
+    _following.update(following)
+    _activity.clear()
+    _activity.update(activity)
+    _settings.clear()
+    _settings.update(settings)
+
+
+def rank_users(user_ids):
+    """Лучшие кандидаты для пачки пользователей.
+
+    Возвращает кортежи (user_id, candidate_id, mutual_count, score).
+    """
+    rows = []
+    limit = _settings['limit']
+    weights = (
+        _settings['mutual_weight'],
+        _settings['activity_weight'],
+        _settings['activity_cap'],
+    )
+    for user_id in user_ids:
+        followed = _following.get(user_id, ())
+        mutual = Counter()
+        for author_id in followed:
+            mutual.update(_following.get(author_id, ()))
+        mutual.pop(user_id, None)
+        for author_id in followed:
+            mutual.pop(author_id, None)
+        ranked = (
+            (score(count, _activity.get(candidate, 0), *weights),
+             candidate, count)
+            for candidate, count in mutual.items()
+        )
+        for value, candidate, count in heapq.nlargest(limit, ranked):
+            rows.append((user_id, candidate, count, value))
+    return rows
@@ -0,0 +1,200 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import recommendation_ranking
+from .constants import (
+    RECOMMENDATION_ACTIVITY_CAP, RECOMMENDATION_ACTIVITY_DAYS,
+    RECOMMENDATION_ACTIVITY_WEIGHT, RECOMMENDATION_FANOUT_LIMIT,
+    RECOMMENDATION_MUTUAL_WEIGHT, RECOMMENDATIONS_SHOWN,
+    RECOMMENDATIONS_STORED,
+)
+from .models import Follow, Post, Recommendation
+
+CHUNK_SIZE = 500
+
+
+def top_for(user):
+    """Готовый список рекомендаций пользователя."""
+    if not user.is_authenticated:
+        return []
+    return list(Recommendation.objects.filter(
+        user=user,
+    ).select_related('candidate')[:RECOMMENDATIONS_SHOWN])
+
+
+def activity(author_ids=None):
+    """Число недавних постов авторов."""
+    since = timezone.now() - timedelta(days=RECOMMENDATION_ACTIVITY_DAYS)
+    posts = Post.objects.filter(pub_date__gte=since)
+    if author_ids is not None:
+        posts = posts.filter(author_id__in=author_ids)
+    return dict(posts.order_by().values('author_id').annotate(
+        total=Count('pk'),
+    ).values_list('author_id', 'total'))
+
+
+def follow_added(user_id, author_id):
+    """Обновляет рекомендации после подписки user на author."""
+    Recommendation.objects.filter(
+        user_id=user_id, candidate_id=author_id,
+    ).delete()
+    followed = _following(user_id)
+    candidates = set(_following(author_id)) - followed - {user_id}
+    _change_mutual({user_id}, candidates, 1)
+    _change_mutual(_followers_without(user_id, author_id), {author_id}, 1)
+
+
+def follow_removed(user_id, author_id):
+    """Обновляет рекомендации после отписки user от author."""
+    followed = _following(user_id)
+    candidates = set(_following(author_id)) - followed - {user_id}
+    _change_mutual({user_id}, candidates, -1)
+    _change_mutual(_followers_without(user_id, author_id), {author_id}, -1)
+    _create(_mutual_counts({user_id}, {author_id}))
+
+
+def recompute(workers=None, log=None):
+    """Полный пересчёт рекомендаций в пуле процессов."""
+    following = {}
+    for user_id, author_id in Follow.objects.filter(
+        user__isnull=False, author__isnull=False,
+    ).values_list('user_id', 'author_id').iterator():
+        following.setdefault(user_id, set()).add(author_id)
+    settings = {
+        'limit': RECOMMENDATIONS_STORED,
+        'mutual_weight': RECOMMENDATION_MUTUAL_WEIGHT,
+        'activity_weight': RECOMMENDATION_ACTIVITY_WEIGHT,
+        'activity_cap': RECOMMENDATION_ACTIVITY_CAP,
+    }
+    user_ids = sorted(following)
+    chunks = [
+        user_ids[start:start + CHUNK_SIZE]
+        for start in range(0, len(user_ids), CHUNK_SIZE)
+    ]
+    total = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=recommendation_ranking.init_worker,
+        initargs=(following, activity(), settings),
+    ) as executor:
+        with transaction.atomic():
+            Recommendation.objects.all().delete()
+            for rows in executor.map(
+                recommendation_ranking.rank_users, chunks,
+            ):
+                Recommendation.objects.bulk_create(
+                    Recommendation(
+                        user_id=user_id,
+                        candidate_id=candidate_id,
+                        mutual_count=mutual_count,
+                        score=score,
+                    )
+                    for user_id, candidate_id, mutual_count, score in rows
+                )
+                total += len(rows)
+                if log:
+                    log(f'Рекомендаций: {total}')
+    return total
+
+
+def _following(user_id):
+    return set(Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True,
+    ))
+
+
+def _followers_without(user_id, author_id):
+    """Подписчики user, ещё не подписанные на author."""
+    followers = Follow.objects.filter(author_id=user_id).exclude(
+        user_id=author_id,
+    ).values_list('user_id', flat=True)[:RECOMMENDATION_FANOUT_LIMIT]
+    already = Follow.objects.filter(
+        author_id=author_id,
+    ).values_list('user_id', flat=True)
+    return set(followers) - set(already.filter(user_id__in=followers))
+
+
+def _change_mutual(user_ids, candidate_ids, delta):
+    """Меняет число общих подписок для всех пар user и candidate.
+
+    Одно из множеств обычно состоит из одного элемента. Отсутствующие
+    пары при delta > 0 создаются с настоящим числом общих подписок.
+    """
+    if not user_ids or not candidate_ids:
+        return
+    pairs = Recommendation.objects.filter(
+        user_id__in=user_ids, candidate_id__in=candidate_ids,
+    )
+    existing = set(pairs.values_list('user_id', 'candidate_id'))
+    if existing:
+        pairs.update(
+            mutual_count=F('mutual_count') + delta,
+            score=F('score') + delta * RECOMMENDATION_MUTUAL_WEIGHT,
+        )
+    if delta < 0:
+        pairs.filter(mutual_count__lte=0).delete()
+        return
+    missing = [
+        (user_id, candidate_id)
+        for user_id in user_ids
+        for candidate_id in candidate_ids
+        if (user_id, candidate_id) not in existing
+    ]
+    if not missing:
+        return
+    # Пары нет и тогда, когда recompute отсёк её лимитом
+    # RECOMMENDATIONS_STORED, поэтому число общих подписок считается
+    # заново, а не принимается равным delta.
+    mutual = _mutual_counts(
+        {user_id for user_id, _ in missing},
+        {candidate_id for _, candidate_id in missing},
+    )
+    _create({pair: mutual.get(pair, 0) for pair in missing})
+
+
+def _create(mutual):
+    """Создаёт рекомендации по числу общих подписок пар."""
+    mutual = {pair: count for pair, count in mutual.items() if count}
+    if not mutual:
+        return
+    recent = activity({candidate_id for _, candidate_id in mutual})
+    Recommendation.objects.bulk_create(
+        (
+            Recommendation(
+                user_id=user_id,
+                candidate_id=candidate_id,
+                mutual_count=count,
+                score=recommendation_ranking.score(
+                    count,
+                    recent.get(candidate_id, 0),
+                    RECOMMENDATION_MUTUAL_WEIGHT,
+                    RECOMMENDATION_ACTIVITY_WEIGHT,
+                    RECOMMENDATION_ACTIVITY_CAP,
+                ),
+            )
+            for (user_id, candidate_id), count in mutual.items()
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def _mutual_counts(user_ids, candidate_ids):
+    """Число общих подписок для пар user и candidate.
+
+    Общая подписка - автор, на которого подписан user и который сам
+    подписан на candidate.
+    """
+    rows = Follow.objects.filter(
+        author_id__in=candidate_ids,
+        user__following__user_id__in=user_ids,
+    ).values('user__following__user_id', 'author_id').annotate(
+        total=Count('pk'),
+    ).values_list('user__following__user_id', 'author_id', 'total')
+    return {
+        (user_id, candidate_id): total
+        for user_id, candidate_id, total in rows.order_by()
+    }
@@ -0,0 +1,117 @@
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .constants import (
+    SEARCH_COMMENT_WEIGHT, SEARCH_MIN_TERM_LENGTH, SEARCH_POST_WEIGHT,
+    SEARCH_TERM_LENGTH,
+)
+from .models import Comment, Post, SearchTerm
+
+TOKEN_RE = re.compile(r'\w+')
+BATCH_SIZE = 1000
+
+
+def tokenize(text):
+    """Разбивает текст на нормализованные слова."""
+    return [
+        token[:SEARCH_TERM_LENGTH]
+        for token in TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+        if len(token) >= SEARCH_MIN_TERM_LENGTH
+    ]
+
+
+def build_terms(post_id, text, comments):
+    """Собирает записи индекса для поста и его комментариев."""
+    weights = Counter()
+    for token in tokenize(text):
+        weights[token] += SEARCH_POST_WEIGHT
+    for comment in comments:
+        for token in tokenize(comment):
+            weights[token] += SEARCH_COMMENT_WEIGHT
+    return [
+        SearchTerm(term=term, post_id=post_id, weight=weight)
+        for term, weight in weights.items()
+    ]
+
+
+def index_post(post_id):
+    """Переиндексирует один пост."""
+    text = Post.objects.filter(pk=post_id).values_list(
+        'text', flat=True,
+    ).first()
+    with transaction.atomic():
+        SearchTerm.objects.filter(post_id=post_id).delete()
+        if text is None:
+            return
+        comments = Comment.objects.filter(post_id=post_id).values_list(
+            'text', flat=True,
+        )
+        SearchTerm.objects.bulk_create(build_terms(post_id, text, comments))
+
+
+def remove_comment(post_id, text):
+    """Вычитает слова удалённого комментария из индекса поста.
+
+    Обходится без вставок, поэтому безопасна и при каскадном удалении
+    поста вместе с комментариями.
+    """
+    for term, count in Counter(tokenize(text)).items():
+        SearchTerm.objects.filter(post_id=post_id, term=term).update(
+            weight=F('weight') - count * SEARCH_COMMENT_WEIGHT,
+        )
+    SearchTerm.objects.filter(post_id=post_id, weight__lte=0).delete()
+
+
+def index_posts(posts):
+    """Переиндексирует посты queryset пачками по первичному ключу."""
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk).order_by(
+            'pk',
+        ).values_list('pk', 'text')[:BATCH_SIZE])
+        if not batch:
+            return
+        last_pk = batch[-1][0]
+        post_ids = [post_id for post_id, _ in batch]
+        comments = {}
+        for post_id, text in Comment.objects.filter(
+            post_id__in=post_ids,
+        ).order_by().values_list('post_id', 'text'):
+            comments.setdefault(post_id, []).append(text)
+        terms = []
+        for post_id, text in batch:
+            terms.extend(build_terms(
+                post_id, text, comments.get(post_id, ()),
+            ))
+        with transaction.atomic():
+            SearchTerm.objects.filter(post_id__in=post_ids).delete()
+            SearchTerm.objects.bulk_create(terms)
+
+
+def rebuild():
+    """Полностью пересобирает поисковый индекс.
+
+    Пересборка идёт в одной транзакции: до коммита поиск видит прежний
+    индекс, а не пустую таблицу.
+    """
+    with transaction.atomic():
+        SearchTerm.objects.all().delete()
+        index_posts(Post.objects.all())
+
+
+def search(query, queryset=None):
+    """Посты, содержащие все слова запроса, с релевантностью score."""
+    terms = set(tokenize(query))
+    if queryset is None:
+        queryset = Post.objects.all()
+    if not terms:
+        return queryset.none()
+    return queryset.filter(
+        search_terms__term__in=terms,
+    ).annotate(
+        score=Sum('search_terms__weight'),
+        matched=Count('search_terms'),
+    ).filter(matched=len(terms)).order_by('-score', '-pk')
@@ -0,0 +1,125 @@
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import (
+    feed_cache, media, recommendations, search, stats, timeline, trending,
+)
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+# Поля пользователя, которые выводятся в лентах и карточках.
+USER_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def _user_names(user):
+    return tuple(
+        user.__dict__.get(field, DEFERRED) for field in USER_NAME_FIELDS
+    )
+
+
+@receiver(post_init, sender=User)
+def user_loaded(sender, instance, **kwargs):
+    """Запоминает имя пользователя, чтобы при смене сбросить ленты."""
+    instance._stored_names = _user_names(instance)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Создаёт счётчики нового пользователя, при смене имени
+    сбрасывает кэш лент.
+    """
+    names = _user_names(instance)
+    stored = getattr(instance, '_stored_names', None)
+    instance._stored_names = names
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+    elif names != stored:
+        feed_cache.bump()
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    """Запоминает картинку поста, чтобы при смене обновить ссылки."""
+    image = instance.__dict__.get('image', DEFERRED)
+    if image is not DEFERRED and not isinstance(image, str):
+        image = None
+    instance._stored_image = image
+
+
+@receiver(post_save, sender=Post)
+def post_image_saved(sender, instance, **kwargs):
+    """Переносит ссылку со старой картинки поста на новую."""
+    image = instance.image.name or None
+    stored = getattr(instance, '_stored_image', DEFERRED)
+    instance._stored_image = image
+    if stored is DEFERRED:
+        # Картинка не загружалась из базы, прежнее значение неизвестно.
+        return
+    if image != (stored or None):
+        media.acquire([image])
+        media.release([stored])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """Разносит новый пост по лентам подписчиков."""
+    feed_cache.bump()
+    search.index_post(instance.pk)
+    if created:
+        stats.change(instance.author_id, posts_count=1)
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Уменьшает счётчик постов автора и ссылки на его файлы."""
+    feed_cache.bump()
+    stats.change(instance.author_id, posts_count=-1)
+    media.release(media.post_files(
+        instance.image.name, instance.image_variants,
+    ))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Group)
+def feed_content_saved(sender, **kwargs):
+    """Сбрасывает кэш лент при изменении их содержимого."""
+    feed_cache.bump()
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    """Переиндексирует пост и поднимает его в популярных."""
+    search.index_post(instance.post_id)
+    if created:
+        trending.record(instance.post_id, instance.created)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Убирает слова и вес комментария из данных поста."""
+    feed_cache.bump()
+    search.remove_comment(instance.post_id, instance.text)
+    trending.record(instance.post_id, instance.created, sign=-1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    """Заполняет ленту и счётчики после подписки."""
+    if created and instance.user_id and instance.author_id:
+        feed_cache.bump_social()
+        stats.change(instance.author_id, followers_count=1)
+        stats.change(instance.user_id, following_count=1)
+        timeline.backfill(instance.user_id, instance.author_id)
+        recommendations.follow_added(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Очищает ленту и счётчики после отписки."""
+    if instance.user_id and instance.author_id:
+        feed_cache.bump_social()
+        stats.change(instance.author_id, followers_count=-1)
+        stats.change(instance.user_id, following_count=-1)
+        timeline.prune(instance.user_id, instance.author_id)
+        recommendations.follow_removed(instance.user_id, instance.author_id)
@@ -0,0 +1,85 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F
+
+from .models import Follow, Post, User, UserStats
+
+
+def change(user_id, **deltas):
+    """Изменяет счётчики пользователя одним UPDATE.
+
+    Отсутствующая запись не создаётся: её восстанавливает ensure
+    или команда rebuild_user_stats.
+    """
+    if user_id is None:
+        return
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    UserStats.objects.filter(user_id=user_id).update(**updates)
+
+
+def ensure(user):
+    """Возвращает счётчики пользователя, создавая их при отсутствии."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        rebuild([user.pk])
+        # Запись ушла в основную базу, реплика может её ещё не видеть.
+        user.stats = UserStats.objects.using(DEFAULT_DB_ALIAS).get(
+            user=user,
+        )
+        return user.stats
+
+
+def actual_counts(user_ids=None):
+    """Считает реальные значения счётчиков по таблицам."""
+    counts = {}
+    sources = (
+        ('posts_count', Post.objects, 'author_id'),
+        ('followers_count', Follow.objects, 'author_id'),
+        ('following_count', Follow.objects, 'user_id'),
+    )
+    for field, manager, key in sources:
+        queryset = manager.all()
+        if user_ids is not None:
+            queryset = queryset.filter(**{f'{key}__in': user_ids})
+        rows = queryset.values(key).annotate(total=Count('pk'))
+        for row in rows.order_by():
+            counts.setdefault(row[key], {})[field] = row['total']
+    return counts
+
+
+def rebuild(user_ids=None):
+    """Пересчитывает счётчики и исправляет расхождения.
+
+    Возвращает число созданных или исправленных записей.
+    """
+    counts = actual_counts(user_ids)
+    users = User.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    existing = {
+        stats.user_id: stats
+        for stats in UserStats.objects.filter(user__in=users)
+    }
+    to_create = []
+    to_update = []
+    for user_id in users.values_list('pk', flat=True).iterator():
+        expected = counts.get(user_id, {})
+        stats = existing.get(user_id)
+        if stats is None:
+            to_create.append(UserStats(user_id=user_id, **expected))
+            continue
+        changed = False
+        for field in ('posts_count', 'followers_count', 'following_count'):
+            value = expected.get(field, 0)
+            if getattr(stats, field) != value:
+                setattr(stats, field, value)
+                changed = True
+        if changed:
+            to_update.append(stats)
+    with transaction.atomic():
+        UserStats.objects.bulk_create(to_create, ignore_conflicts=True)
+        UserStats.objects.bulk_update(
+            to_update,
+            ('posts_count', 'followers_count', 'following_count'),
+        )
+    return len(to_create) + len(to_update)
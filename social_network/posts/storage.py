@@ -0,0 +1,56 @@
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+CONTENT_ADDRESSED_NAME = re.compile(
+    r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$'
+)
+
+
+def is_content_addressed(name):
+    """Назван ли файл по хэшу содержимого."""
+    return bool(CONTENT_ADDRESSED_NAME.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по SHA-256 содержимого.
+
+    Файл posts/photo.jpg сохраняется как posts/ab/cd/abcd....jpg:
+    вложенные каталоги держат размер каждого небольшим, а одинаковые
+    загрузки попадают в один файл. Когда файл можно удалить, решает
+    счётчик ссылок в posts.media.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    @staticmethod
+    def hashed_name(name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        hexdigest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(
+            posixpath.dirname(name),
+            hexdigest[:2],
+            hexdigest[2:4],
+            f'{hexdigest}{extension}',
+        )
+
+
+media_storage = ContentAddressedStorage()
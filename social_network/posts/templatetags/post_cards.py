@@ -0,0 +1,11 @@
+from django import template
+
+from .. import cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Пары (пост, HTML карточки) для ленты."""
+    return cards.render_many(posts)
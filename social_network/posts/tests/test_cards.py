@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import cards
+from ..models import Group, Post, User
+
+
+class PostCardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='TestAuthor', first_name='Иван',
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def card(self):
+        post = Post.objects.for_feed().get(pk=self.post.pk)
+        return cards.render_many([post])[0][1]
+
+    def test_card_matches_include(self):
+        """Сохранённая карточка совпадает с рендерингом шаблона."""
+        post = Post.objects.for_feed().get(pk=self.post.pk)
+        self.assertEqual(self.card(), cards.render(post))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, cards.render(post), html=True)
+
+    def test_card_is_rendered_once(self):
+        """Повторный вывод берёт карточку из кэша."""
+        html = self.card()
+        with mock.patch.object(cards, 'render', side_effect=AssertionError):
+            self.assertEqual(self.card(), html)
+
+    def test_author_and_group_changes_update_card(self):
+        """Изменение имени автора или группы обновляет карточку."""
+        self.card()
+        self.author.first_name = 'Пётр'
+        self.author.save()
+        self.assertIn('Пётр', self.card())
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertIn('Новое название', self.card())
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        self.post.refresh_from_db()
+        self.post.save()
+        self.assertIn('Новый текст', self.card())
+
+    def test_author_rename_updates_feeds(self):
+        """Смена имени автора видна в закэшированной ленте."""
+        reader = User.objects.create_user(username='TestReader')
+        self.client.force_login(reader)
+        url = reverse('posts:index')
+        self.assertContains(self.client.get(url), 'Иван')
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Сергей'
+        author.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'Сергей')
+        self.assertNotContains(response, 'Иван')
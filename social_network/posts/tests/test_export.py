@@ -0,0 +1,114 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.other = User.objects.create_user(username='TestOther')
+        cls.staff = User.objects.create_user(
+            username='TestStaff', is_staff=True,
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=(
+                    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+                    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+                    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+                    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+                    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+                    b'\x0A\x00\x3B'
+                ),
+                content_type='image/gif',
+            ),
+        )
+        Post.objects.create(author=cls.other, text='Чужой пост')
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text='Комментарий',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.url = reverse(
+            'posts:profile_export', kwargs={'username': self.author},
+        )
+
+    def test_ndjson_export(self):
+        """Выгрузка NDJSON содержит только записи пользователя."""
+        response = self.author_client.get(self.url)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [(record['type'], record['text']) for record in records],
+            [('post', 'Пост с картинкой'), ('comment', 'Комментарий')],
+        )
+
+    def test_csv_export(self):
+        """Выгрузка CSV начинается с заголовка колонок."""
+        response = self.author_client.get(self.url, {'format': 'csv'})
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0][:2], ['type', 'id'])
+        self.assertEqual(len(rows), 3)
+
+    def test_zip_export_contains_images(self):
+        """Zip-архив содержит данные и картинки постов."""
+        response = self.author_client.get(self.url, {'format': 'zip'})
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content))
+        )
+        self.assertEqual(
+            archive.namelist(), ['data.ndjson', self.post.image.name],
+        )
+        self.assertIsNone(archive.testzip())
+
+    def test_export_access(self):
+        """Чужие данные выгружает только персонал."""
+        other_client = Client()
+        other_client.force_login(self.other)
+        self.assertRedirects(
+            other_client.get(self.url),
+            reverse('posts:profile', kwargs={'username': self.author}),
+        )
+        staff_client = Client()
+        staff_client.force_login(self.staff)
+        self.assertTrue(staff_client.get(self.url).streaming)
+
+    def test_command_writes_file(self):
+        """Команда export_user_data сохраняет выгрузку в файл."""
+        output = os.path.join(TEMP_MEDIA_ROOT, 'export.zip')
+        call_command(
+            'export_user_data', self.author.username, format='zip',
+            output=output, stdout=StringIO(),
+        )
+        with zipfile.ZipFile(output) as archive:
+            self.assertIn('data.ndjson', archive.namelist())
@@ -81,7 +81,10 @@ class PostCreateFormTests(TestCase):
         last_posts = difference_sets_of_posts.pop()
         self.assertEqual(last_posts.text, form_data['text'])
         self.assertEqual(last_posts.group.pk, form_data['group'])
-        self.assertEqual(last_posts.image, 'posts/1_small.gif')
+        self.assertRegex(
+            last_posts.image.name,
+            r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.gif$',
+        )
         self.assertEqual(last_posts.author, self.auth_user)
 
     def test_author_edit_post(self):
@@ -0,0 +1,131 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import images
+from ..constants import IMAGE_MAX_SIZE
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_upload(width, height, name='photo.jpg', image_format='JPEG'):
+    image = Image.new('RGB', (width, height), (200, 100, 50))
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera'
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, exif=exif)
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), Image.MIME[image_format],
+    )
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_PREGENERATE_ASYNC=False,
+)
+class ImageIngestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_ingest_downscales_and_strips_exif(self):
+        """Оригинал уменьшается и пережимается без EXIF."""
+        for name, image_format in (
+            ('photo.jpg', 'JPEG'),
+            ('photo.png', 'PNG'),
+        ):
+            with self.subTest(image_format=image_format):
+                uploaded = images.ingest(image_upload(
+                    IMAGE_MAX_SIZE * 2, 1000, name, image_format,
+                ))
+                content = uploaded.read()
+                image = Image.open(io.BytesIO(content))
+                self.assertEqual(image.format, image_format)
+                self.assertEqual(image.size, (IMAGE_MAX_SIZE, 500))
+                self.assertNotIn('exif', image.info)
+                self.assertNotIn(b'Camera', content)
+                self.assertEqual(uploaded.name, name)
+
+    def test_ingest_saves_mpo_as_jpeg(self):
+        """MPO пересохраняется обычным JPEG."""
+        open_image = Image.open
+
+        def open_as_mpo(file):
+            image = open_image(file)
+            image.format = 'MPO'
+            return image
+
+        with mock.patch.object(images.Image, 'open', open_as_mpo):
+            uploaded = images.ingest(image_upload(100, 50, 'stereo.mpo'))
+        self.assertEqual(Image.open(uploaded).format, 'JPEG')
+        self.assertEqual(uploaded.name, 'stereo.jpg')
+        self.assertEqual(uploaded.content_type, 'image/jpeg')
+
+    def test_animated_image_has_no_variants(self):
+        """Для анимации копии не создаются, отдаётся оригинал."""
+        frames = [
+            Image.new('RGB', (1200, 600), color)
+            for color in ((255, 0, 0), (0, 0, 255))
+        ]
+        buffer = io.BytesIO()
+        frames[0].save(
+            buffer, 'GIF', save_all=True, append_images=frames[1:],
+        )
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Анимация',
+            'image': SimpleUploadedFile(
+                'animation.gif', buffer.getvalue(), 'image/gif',
+            ),
+        })
+        post = Post.objects.get()
+        self.assertTrue(Image.open(post.image).is_animated)
+        self.assertEqual((post.image_width, post.image_height), (1200, 600))
+        self.assertEqual(post.variants, [])
+
+    def test_post_create_builds_variants(self):
+        """При создании поста сохраняются размеры и копии картинки."""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с фото',
+            'image': image_upload(1200, 600),
+        })
+        post = Post.objects.get()
+        self.assertEqual((post.image_width, post.image_height), (1200, 600))
+        widths = [
+            variant['width'] for variant in post.variants
+            if variant['format'] == 'jpeg'
+        ]
+        self.assertEqual(widths, [480, 960])
+        for variant in post.variants:
+            self.assertTrue(default_storage.exists(variant['name']))
+        formats = {variant['format'] for variant in post.variants}
+        self.assertEqual('webp' in formats, images.WEBP_SUPPORTED)
+
+    def test_card_uses_srcset_without_opening_files(self):
+        """Карточка поста выводит srcset по сохранённым размерам."""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с фото',
+            'image': image_upload(1200, 600),
+        })
+        with mock.patch.object(Image, 'open', side_effect=AssertionError):
+            response = self.client.get(reverse('posts:index'))
+        content = response.content.decode()
+        self.assertIn('480w', content)
+        self.assertIn('width="1200"', content)
@@ -0,0 +1,108 @@
+import gzip
+from unittest import skipUnless
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db.models import F
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from .. import feed_cache, page_cache
+from ..models import Comment, FeedGeneration, Post, User
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:index')
+
+    def test_cached_page_served_without_queries(self):
+        """Повторный запрос анонима не обращается к базе и шаблонам."""
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertIn('Accept-Encoding', second['Vary'])
+
+    def test_key_does_not_depend_on_host(self):
+        """Страница, прогретая с другим хостом, берётся из кэша."""
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, HTTP_HOST='localhost')
+        self.assertEqual(second.content, first.content)
+
+    def test_gzip_body_is_stored_compressed(self):
+        """Клиент с gzip получает заранее сжатое тело."""
+        plain = self.client.get(self.url).content
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain)
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity',
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @skipUnless(page_cache.brotli, 'brotli не установлен')
+    def test_brotli_is_preferred(self):
+        """brotli выбирается раньше gzip."""
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip, br',
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+    def test_writes_invalidate_pages(self):
+        """Новые посты и комментарии сразу видны анонимам."""
+        detail = reverse('posts:post_detail', args=(self.post.pk,))
+        self.client.get(self.url)
+        self.client.get(detail)
+        Post.objects.create(author=self.author, text='Новый пост')
+        self.assertContains(self.client.get(self.url), 'Новый пост')
+        comment = Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий',
+        )
+        self.assertContains(self.client.get(detail), 'Комментарий')
+        comment.delete()
+        self.assertNotContains(self.client.get(detail), 'Комментарий')
+
+    def test_generation_is_shared_between_processes(self):
+        """Смена поколения в базе видна после истечения кэша процесса."""
+        self.client.get(self.url)
+        Post.objects.bulk_create([
+            Post(author=self.author, text='Из другого процесса'),
+        ])
+        FeedGeneration.objects.filter(
+            key=feed_cache.GENERATION_KEY,
+        ).update(value=F('value') + 1)
+        self.assertNotContains(self.client.get(self.url), 'Из другого')
+        cache.delete(feed_cache.GENERATION_KEY)
+        self.assertContains(self.client.get(self.url), 'Из другого')
+
+    def test_authenticated_users_bypass_cache(self):
+        """Авторизованные пользователи получают свою страницу."""
+        self.client.get(self.url)
+        self.client.force_login(self.author)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertContains(response, 'Пользователь: TestAuthor')
+
+    def test_pages_with_csrf_token_are_not_cached(self):
+        """Страница с CSRF-токеном рендерится для каждого клиента."""
+        calls = []
+
+        @page_cache.anonymous_page_cache
+        def view(request):
+            calls.append(request)
+            return HttpResponse(get_token(request))
+
+        for _ in range(2):
+            request = RequestFactory().get(self.url)
+            request.user = AnonymousUser()
+            view(request)
+        self.assertEqual(len(calls), 2)
@@ -0,0 +1,124 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .utils import QueryBudgetMixin
+from .. import urls
+from ..constants import POSTS_PAGE
+from ..models import Comment, Follow, Group, Post, User
+
+# Максимальное число запросов для авторизованного пользователя,
+# включая чтение сессии и пользователя и проверку свежести страницы.
+QUERY_BUDGETS = {
+    # Первый запрос после cache.clear читает три поколения из базы.
+    'index': 6,
+    'group_list': 6,
+    'profile': 7,
+    'hot': 4,
+    'search': 4,
+    'post_detail': 5,
+    'post_create': 3,
+    'post_edit': 5,
+    'add_comment': 3,
+    'follow_index': 5,
+    # Подписка и отписка пишут в базу, состав запросов расписан
+    # в WRITE_QUERY_BUDGETS; здесь пользователь уже в кэше.
+    'profile_follow': 15,
+    'profile_unfollow': 12,
+    'profile_export': 5,
+}
+
+# Бюджеты POST подписки и затем отписки от того же автора.
+WRITE_QUERY_BUDGETS = {
+    # Поколение пользователей, пользователь сессии и автор (3),
+    # get_or_create с точкой сохранения (4), поколение лент (1),
+    # счётчики UserStats (2), заполнение ленты (2), рекомендации (5).
+    'profile_follow': 17,
+    # Автор (1), поиск и удаление подписки (2), поколение лент (1),
+    # счётчики UserStats (2), очистка ленты (1), пересчёт
+    # рекомендации для потерянного общего автора (8).
+    'profile_unfollow': 15,
+}
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [
+            User.objects.create_user(username=f'TestUser{i}')
+            for i in range(POSTS_PAGE)
+        ]
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for author in cls.users[1:-1]:
+            Follow.objects.create(user=cls.users[0], author=author)
+            Follow.objects.create(user=author, author=cls.users[-1])
+        for author in cls.users:
+            for i in range(2):
+                post = Post.objects.create(
+                    author=author,
+                    group=cls.group,
+                    text=f'Тестовый пост {i}',
+                )
+                Comment.objects.create(
+                    post=post,
+                    author=author,
+                    text='Тестовый комментарий',
+                )
+        cls.post = Post.objects.filter(author=cls.users[0]).first()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.users[0])
+
+    def test_every_view_has_budget(self):
+        """У каждого маршрута posts есть бюджет запросов."""
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names, set(QUERY_BUDGETS))
+
+    def test_views_fit_budget(self):
+        """Маршруты posts укладываются в бюджет запросов."""
+        kwargs = {
+            'group_list': {'slug': self.group.slug},
+            'profile': {'username': self.users[1].username},
+            'post_detail': {'post_id': self.post.pk},
+            'post_edit': {'post_id': self.post.pk},
+            'add_comment': {'post_id': self.post.pk},
+            'profile_follow': {'username': self.users[-1].username},
+            'profile_unfollow': {'username': self.users[1].username},
+            'profile_export': {'username': self.users[0].username},
+        }
+        params = {'search': {'q': 'тестовый пост'}}
+        for name, budget in QUERY_BUDGETS.items():
+            url = reverse(f'posts:{name}', kwargs=kwargs.get(name))
+            with self.subTest(name=name):
+                with self.assertMaxQueries(budget, name):
+                    response = self.client.get(url, params.get(name))
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertLess(response.status_code, 400)
+
+    def test_follow_writes_fit_budget(self):
+        """POST подписки и отписки укладывается в бюджет и перенаправляет."""
+        user, author = self.users[0], self.users[-1]
+        for name, exists in (
+            ('profile_follow', True),
+            ('profile_unfollow', False),
+        ):
+            url = reverse(f'posts:{name}', args=(author.username,))
+            with self.subTest(name=name):
+                with self.assertMaxQueries(WRITE_QUERY_BUDGETS[name], name):
+                    response = self.client.post(url)
+                self.assertRedirects(
+                    response,
+                    reverse('posts:profile', args=(author.username,)),
+                    fetch_redirect_response=False,
+                )
+                self.assertEqual(
+                    Follow.objects.filter(user=user, author=author).exists(),
+                    exists,
+                )
@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Follow, Post, Recommendation, User
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader, cls.friend, cls.author, cls.fan = (
+            User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'author', 'fan')
+        )
+        Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def recommended(self, user):
+        return dict(Recommendation.objects.filter(user=user).values_list(
+            'candidate__username', 'mutual_count',
+        ))
+
+    def test_follow_events_update_recommendations(self):
+        """Подписки и отписки обновляют рекомендации."""
+        Follow.objects.create(user=self.friend, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.friend)
+        self.assertEqual(self.recommended(self.reader), {'author': 1})
+        Follow.objects.create(user=self.fan, author=self.reader)
+        Follow.objects.create(user=self.reader, author=self.fan)
+        self.assertEqual(self.recommended(self.fan), {'friend': 1})
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.recommended(self.reader), {})
+        self.assertEqual(
+            self.recommended(self.fan), {'friend': 1, 'author': 1}
+        )
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertEqual(self.recommended(self.reader), {'author': 1})
+        self.assertEqual(self.recommended(self.fan), {'friend': 1})
+        Follow.objects.filter(user=self.reader, author=self.friend).delete()
+        self.assertEqual(self.recommended(self.reader), {})
+
+    def test_pair_cut_off_by_limit_gets_real_count(self):
+        """Пара, не попавшая в сохранённые, получает настоящее число."""
+        other = User.objects.create_user(username='other')
+        for user in (self.friend, self.fan, other):
+            Follow.objects.create(user=user, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.friend)
+        Follow.objects.create(user=self.reader, author=self.fan)
+        # recompute хранит только RECOMMENDATIONS_STORED кандидатов.
+        Recommendation.objects.filter(user=self.reader).delete()
+        Follow.objects.create(user=self.reader, author=other)
+        self.assertEqual(self.recommended(self.reader)['author'], 3)
+
+    def test_recompute_matches_incremental(self):
+        """Полный пересчёт совпадает с инкрементальными обновлениями."""
+        Follow.objects.create(user=self.friend, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.friend)
+        Follow.objects.create(user=self.fan, author=self.reader)
+        expected = {
+            user: self.recommended(user)
+            for user in (self.reader, self.friend, self.fan)
+        }
+        Recommendation.objects.all().delete()
+        call_command(
+            'recompute_recommendations', workers=1, stdout=StringIO(),
+        )
+        for user, recommended in expected.items():
+            with self.subTest(user=user):
+                self.assertEqual(self.recommended(user), recommended)
+        scores = Recommendation.objects.filter(
+            user=self.reader,
+        ).values_list('score', flat=True)
+        self.assertGreater(scores[0], 1)
+
+    def test_recommendations_shown_on_follow_page(self):
+        """Рекомендации выводятся на странице подписок."""
+        Follow.objects.create(user=self.friend, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.friend)
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertContains(
+            response,
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        )
@@ -0,0 +1,85 @@
+from django.contrib.admin.sites import site
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post, SearchTerm, User
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.cats = Post.objects.create(
+            author=cls.author,
+            text='Кошки спят. Кошки едят.',
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.author,
+            text='Собаки и кошки гуляют',
+        )
+
+    def test_index_updates_on_save(self):
+        """Индекс обновляется при изменении поста."""
+        post = Post.objects.get(pk=self.dogs.pk)
+        post.text = 'Только собаки'
+        post.save()
+        self.assertEqual(list(search.search('кошки')), [self.cats])
+
+    def test_results_are_ranked(self):
+        """Результаты упорядочены по релевантности."""
+        self.assertEqual(
+            list(search.search('кошки')), [self.cats, self.dogs]
+        )
+        self.assertEqual(list(search.search('кошки собаки')), [self.dogs])
+
+    def test_comments_are_indexed(self):
+        """Комментарии учитываются при поиске и удаляются из индекса."""
+        comment = Comment.objects.create(
+            post=self.cats,
+            author=self.author,
+            text='Попугаи тоже',
+        )
+        self.assertEqual(list(search.search('попугаи')), [self.cats])
+        comment.delete()
+        self.assertFalse(search.search('попугаи').exists())
+
+    def test_post_delete_with_comments(self):
+        """Удаление поста с комментариями очищает индекс."""
+        Comment.objects.create(
+            post=self.dogs,
+            author=self.author,
+            text='Комментарий',
+        )
+        Post.objects.filter(pk=self.dogs.pk).delete()
+        self.assertFalse(SearchTerm.objects.filter(post_id=self.dogs.pk))
+
+    def test_search_view_paginates_by_cursor(self):
+        """Страница поиска выводит результаты с курсорной пагинацией."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text='ежи')
+            for _ in range(12)
+        )
+        search.rebuild()
+        url = reverse('posts:search')
+        first_page = self.client.get(url, {'q': 'ежи'}).context['page_obj']
+        second_page = self.client.get(
+            url, {'q': 'ежи', 'after': first_page.next_cursor},
+        ).context['page_obj']
+        found = [post.pk for post in first_page] + [
+            post.pk for post in second_page
+        ]
+        self.assertEqual(len(found), 12)
+        self.assertEqual(len(set(found)), 12)
+        self.assertEqual(first_page.base_query, 'q=%D0%B5%D0%B6%D0%B8')
+
+    def test_admin_uses_index(self):
+        """Поиск в админке использует индекс."""
+        model_admin = site._registry[Post]
+        request = RequestFactory().get('/')
+        queryset, use_distinct = model_admin.get_search_results(
+            request, Post.objects.all(), 'собаки',
+        )
+        self.assertEqual(list(queryset), [self.dogs])
+        self.assertFalse(use_distinct)
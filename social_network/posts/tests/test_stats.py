@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Follow, Post, User, UserStats
+
+
+class UserStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении постов и подписок."""
+        post = Post.objects.create(author=self.author, text='Тестовый пост')
+        Follow.objects.create(user=self.reader, author=self.author)
+        author_stats = UserStats.objects.get(user=self.author)
+        reader_stats = UserStats.objects.get(user=self.reader)
+        self.assertEqual(author_stats.posts_count, 1)
+        self.assertEqual(author_stats.followers_count, 1)
+        self.assertEqual(reader_stats.following_count, 1)
+        post.delete()
+        Follow.objects.all().delete()
+        author_stats.refresh_from_db()
+        reader_stats.refresh_from_db()
+        self.assertEqual(author_stats.posts_count, 0)
+        self.assertEqual(author_stats.followers_count, 0)
+        self.assertEqual(reader_stats.following_count, 0)
+
+    def test_profile_reads_counters_from_stats(self):
+        """Профиль выводит счётчики из записи статистики."""
+        UserStats.objects.filter(user=self.author).update(posts_count=42)
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.author})
+        )
+        self.assertContains(response, 'Всего постов: 42')
+
+    def test_missing_stats_are_rebuilt_on_profile(self):
+        """Отсутствующая запись статистики восстанавливается."""
+        Post.objects.create(author=self.author, text='Тестовый пост')
+        UserStats.objects.filter(user=self.author).delete()
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.author})
+        )
+        self.assertContains(response, 'Всего постов: 1')
+
+    def test_rebuild_command_repairs_counters(self):
+        """Команда rebuild_user_stats исправляет расхождения."""
+        Post.objects.create(author=self.author, text='Тестовый пост')
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+        UserStats.objects.filter(user=self.reader).delete()
+        out = StringIO()
+        call_command('rebuild_user_stats', stdout=out)
+        self.assertIn('2', out.getvalue())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 1
+        )
+        self.assertTrue(UserStats.objects.filter(user=self.reader).exists())
@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from ..models import MediaFile, Post, User
+from ..storage import is_content_addressed, media_storage
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def upload(name='small.gif'):
+    return SimpleUploadedFile(name, SMALL_GIF, content_type='image/gif')
+
+
+def tearDownModule():
+    shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='TestAuthor')
+
+    def test_identical_uploads_are_deduplicated(self):
+        """Одинаковые загрузки хранятся одним файлом со счётчиком ссылок."""
+        first = Post.objects.create(
+            author=self.author, text='Первый', image=upload('a.gif'),
+        )
+        second = Post.objects.create(
+            author=self.author, text='Второй', image=upload('b.gif'),
+        )
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        self.assertTrue(is_content_addressed(name))
+        self.assertEqual(MediaFile.objects.get(name=name).references, 2)
+        first.delete()
+        self.assertTrue(media_storage.exists(name))
+        self.assertEqual(MediaFile.objects.get(name=name).references, 1)
+        second.delete()
+        self.assertFalse(media_storage.exists(name))
+        self.assertFalse(MediaFile.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MigrateMediaStorageTests(TestCase):
+    def test_command_moves_legacy_files(self):
+        """Команда переносит старые файлы и обновляет пути постов."""
+        author = User.objects.create_user(username='TestAuthor')
+        legacy = default_storage.save(
+            'posts/legacy.gif', ContentFile(SMALL_GIF),
+        )
+        for text in ('Первый', 'Второй'):
+            Post.objects.create(author=author, text=text, image=legacy)
+        call_command('migrate_media_storage', batch_size=1, stdout=StringIO())
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(is_content_addressed(name))
+        self.assertTrue(media_storage.exists(name))
+        self.assertFalse(default_storage.exists(legacy))
+        self.assertEqual(MediaFile.objects.get(name=name).references, 2)
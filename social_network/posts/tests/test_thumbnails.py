@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import thumbnails
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_PREGENERATE_ASYNC=False,
+)
+class PregenerateThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=(
+                    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+                    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+                    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+                    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+                    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+                    b'\x0A\x00\x3B'
+                ),
+                content_type='image/gif',
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def thumbnail_files(self):
+        return [
+            os.path.join(root, name)
+            for root, _, files in os.walk(
+                os.path.join(TEMP_MEDIA_ROOT, 'cache'),
+            )
+            for name in files
+        ]
+
+    def test_command_generates_thumbnails(self):
+        """Команда создаёт миниатюры для существующих картинок."""
+        out = StringIO()
+        call_command('pregenerate_thumbnails', workers=0, stdout=out)
+        self.assertIn('Обработано картинок: 1', out.getvalue())
+        self.assertEqual(len(self.thumbnail_files()), 1)
+
+    def test_render_uses_pregenerated_thumbnail(self):
+        """Шаблон находит готовую миниатюру и не создаёт новую."""
+        call_command('pregenerate_thumbnails', workers=0, stdout=StringIO())
+        generated = self.thumbnail_files()
+        cache.clear()
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(self.thumbnail_files(), generated)
+
+    def test_new_post_thumbnail_is_generated_after_commit(self):
+        """Миниатюра нового поста готова до первого запроса ленты."""
+        cache.clear()
+        with self.post.image.open('rb') as file:
+            content = file.read()
+        self.client.force_login(self.author)
+        with mock.patch.object(
+            thumbnails.transaction, 'on_commit', lambda func: func(),
+        ):
+            self.client.post(reverse('posts:post_create'), {
+                'text': 'Новый пост',
+                'image': SimpleUploadedFile(
+                    'new.gif', content, 'image/gif',
+                ),
+            })
+        post = Post.objects.get(text='Новый пост')
+        with mock.patch.object(thumbnails, '_submit') as submit:
+            found = thumbnails.urls([post.image.name])
+        submit.assert_not_called()
+        self.assertIn(post.image.name, found)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..constants import TRENDING_HALF_LIFE
+from ..models import Comment, Post, PostTrend, User
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.quiet, cls.popular = (
+            Post.objects.create(author=cls.author, text=text)
+            for text in ('Тихий пост', 'Популярный пост')
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, post):
+        return Comment.objects.create(
+            post=post, author=self.author, text='Комментарий',
+        )
+
+    def score(self, post):
+        return PostTrend.objects.get(post=post).score
+
+    def test_comments_order_hot_feed(self):
+        """Обсуждаемые посты идут первыми, удаление снижает вес."""
+        self.comment(self.quiet)
+        self.comment(self.popular)
+        extra = self.comment(self.popular)
+        response = self.client.get(reverse('posts:hot'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.popular, self.quiet],
+        )
+        extra.delete()
+        self.assertAlmostEqual(
+            self.score(self.popular), self.score(self.quiet), places=3,
+        )
+
+    def test_recent_events_weigh_more(self):
+        """Вес события удваивается каждые TRENDING_HALF_LIFE секунд."""
+        now = trending.epoch()
+        later = now + timedelta(seconds=TRENDING_HALF_LIFE)
+        trending.record(self.quiet.pk, now)
+        trending.record(self.popular.pk, later)
+        self.assertAlmostEqual(
+            self.score(self.popular) / self.score(self.quiet), 2,
+        )
+
+    def test_renormalize_keeps_order_and_prunes(self):
+        """Перенос точки отсчёта сохраняет порядок и удаляет угасшие."""
+        started = trending.epoch()
+        trending.record(self.quiet.pk, started)
+        trending.record(self.popular.pk, started + timedelta(days=3))
+        trending.renormalize(started + timedelta(days=3))
+        self.assertAlmostEqual(self.score(self.popular), 1)
+        self.assertFalse(PostTrend.objects.filter(post=self.quiet).exists())
+        trending.renormalize(started + timedelta(days=3, hours=6))
+        self.assertAlmostEqual(self.score(self.popular), 0.5)
+
+    def test_rebuild_matches_incremental_scores(self):
+        """Пересчёт по комментариям совпадает с накопленными весами."""
+        self.comment(self.quiet)
+        self.comment(self.popular)
+        self.comment(self.popular)
+        ratio = self.score(self.popular) / self.score(self.quiet)
+        trending.rebuild(timezone.now())
+        self.assertAlmostEqual(
+            self.score(self.popular) / self.score(self.quiet), ratio,
+            places=3,
+        )
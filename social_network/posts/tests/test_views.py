@@ -7,8 +7,14 @@ from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
 from django import forms
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Group, Post, User, Follow
+from .. import feed_cache, follow_graph, stats, timeline
+from ..models import (
+    Comment, FeedGeneration, Group, Post, User, Follow, TimelineEntry,
+)
 from ..constants import POSTS_PAGE
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -223,20 +229,34 @@ class PostTests(TestCase):
             reverse('posts:index')
         )
         response_1 = response.content
-        post_deleted = Post.objects.get(id=self.post.pk)
-        post_deleted.delete()
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
         response_again = self.authorized_client.get(
             reverse('posts:index')
         )
         response_2 = response_again.content
         self.assertTrue(response_1 == response_2)
-        cache.clear()
+        post_deleted = Post.objects.get(id=self.post.pk)
+        post_deleted.delete()
         response_again_2 = self.authorized_client.get(
             reverse('posts:index')
         )
         response_3 = response_again_2.content
         self.assertFalse(response_1 == response_3)
 
+    def test_cache_varies_by_page(self):
+        """Кэш ленты различает страницы."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {i}')
+            for i in range(POSTS_PAGE)
+        )
+        cache.clear()
+        first_page = self.client.get(reverse('posts:index')).content
+        second_page = self.client.get(
+            reverse('posts:index') + '?page=2'
+        ).content
+        self.assertNotEqual(first_page, second_page)
+        self.assertIn(self.post.text.encode(), second_page)
+
     def test_follow_user(self):
         """Тест подписки на другого пользователя."""
         follows_count = Follow.objects.count()
@@ -324,6 +344,9 @@ class PaginatorViewsTest(TestCase):
         ]
         Post.objects.bulk_create(cls.posts)
 
+    def setUp(self):
+        cache.clear()
+
     def test_first_page_contains_ten_records(self):
         """Количество постов на страницах index, group_list, profile
         равно 10.
@@ -363,3 +386,278 @@ class PaginatorViewsTest(TestCase):
             response = self.client.get(url)
             amount_posts = len(response.context.get('page_obj').object_list)
             self.assertEqual(amount_posts, 3)
+
+    def test_cursor_pages_walk_whole_feed(self):
+        """Курсорная пагинация проходит ленту без пропусков и повторов."""
+        url = reverse('posts:index')
+        first_page = self.client.get(url).context.get('page_obj')
+        self.assertTrue(first_page.is_cursor)
+        self.assertFalse(first_page.has_previous())
+        second_page = self.client.get(
+            url, {'after': first_page.next_cursor}
+        ).context.get('page_obj')
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(second_page.has_next())
+        seen = [post.pk for post in first_page] + [
+            post.pk for post in second_page
+        ]
+        self.assertEqual(
+            seen,
+            list(Post.objects.order_by(
+                '-pub_date', '-pk'
+            ).values_list('pk', flat=True)),
+        )
+        newer_page = self.client.get(
+            url, {'before': second_page.previous_cursor}
+        ).context.get('page_obj')
+        self.assertEqual(list(newer_page), list(first_page))
+
+    def test_cursor_feeds_do_not_count(self):
+        """Курсорные ленты не считают записи, профиль берёт счётчик."""
+        stats.rebuild()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertFalse(any(
+            'COUNT(' in query['sql'] for query in queries.captured_queries
+        ))
+        self.assertIsNone(response.context['page_obj'].estimated_count)
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.author})
+        )
+        self.assertContains(response, 'Всего записей: ~13')
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Некорректный курсор возвращает первую страницу."""
+        response = self.client.get(reverse('posts:index'), {'after': '!!'})
+        amount_posts = len(response.context.get('page_obj').object_list)
+        self.assertEqual(amount_posts, POSTS_PAGE)
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Пост до подписки',
+        )
+
+    def test_follow_backfills_timeline(self):
+        """После подписки старые посты автора попадают в ленту."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader,
+            post=self.post,
+        ).exists())
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(
+            author=self.author,
+            text='Пост после подписки',
+        )
+        entry = TimelineEntry.objects.get(user=self.reader, post=new_post)
+        self.assertEqual(entry.pub_date, new_post.pub_date)
+
+    def test_unfollow_prunes_timeline(self):
+        """После отписки посты автора удаляются из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+
+    def test_rebuild_restores_timeline(self):
+        """Пересборка восстанавливает ленты по подпискам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        timeline.rebuild()
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user', 'post')),
+            [(self.reader.pk, self.post.pk)],
+        )
+
+    def test_follow_feed_reads_timeline_index_range(self):
+        """Страницы ленты подписок читают диапазон индекса без сортировки."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {i}')
+            for i in range(POSTS_PAGE)
+        )
+        timeline.rebuild()
+        cache.clear()
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('posts:follow_index')
+        response = client.get(url)
+        cursor = response.context['page_obj'].next_cursor
+        for query in ('', f'?after={cursor}'):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url + query)
+            self.assertEqual(len(response.context['page_obj']), (
+                POSTS_PAGE if not query else 1
+            ))
+            sql = next(
+                captured['sql'] for captured in queries.captured_queries
+                if 'ORDER BY' in captured['sql']
+                and 'posts_timelineentry' in captured['sql']
+            )
+            with connection.cursor() as db_cursor:
+                db_cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = ' '.join(str(row) for row in db_cursor.fetchall())
+            self.assertIn('timeline_user_pub_date_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_following_is_cached_and_invalidated(self):
+        """Подписки берутся из кэша и сбрасываются при изменениях."""
+        self.assertFalse(
+            follow_graph.is_following(self.reader.pk, self.author.pk)
+        )
+        with self.assertNumQueries(0):
+            follow_graph.is_following(self.reader.pk, self.author.pk)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            follow_graph.following_ids(self.reader.pk), {self.author.pk}
+        )
+        Follow.objects.all().delete()
+        self.assertFalse(
+            follow_graph.is_following(self.reader.pk, self.author.pk)
+        )
+
+    def test_follow_in_other_process_is_seen(self):
+        """Подписка из другого процесса видна после смены поколения."""
+        follow_graph.is_following(self.reader.pk, self.author.pk)
+        Follow.objects.bulk_create([
+            Follow(user=self.reader, author=self.author),
+        ])
+        FeedGeneration.objects.filter(
+            key=feed_cache.SOCIAL_GENERATION_KEY,
+        ).update(value=F('value') + 1)
+        cache.delete(feed_cache.SOCIAL_GENERATION_KEY)
+        self.assertTrue(
+            follow_graph.is_following(self.reader.pk, self.author.pk)
+        )
+
+    def test_repeated_follow_is_idempotent(self):
+        """Повторная подписка не создаёт дубликат."""
+        url = reverse(
+            'posts:profile_follow', kwargs={'username': self.author}
+        )
+        self.client.get(url)
+        cache.clear()
+        self.client.get(url)
+        self.assertEqual(
+            Follow.objects.filter(
+                user=self.reader, author=self.author
+            ).count(),
+            1,
+        )
+
+    def test_follow_ignores_stale_cache(self):
+        """Подписка создаётся, даже если кэш считает её существующей."""
+        cache.set(
+            follow_graph.following_key(self.reader.pk),
+            frozenset({self.author.pk}),
+        )
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}
+        ))
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author
+        ).exists())
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_unchanged_page_returns_304(self):
+        """Неизменная страница отдаётся без ленты и шаблона."""
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'],
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_anonymous_last_modified(self):
+        """Анонимы получают Last-Modified, авторизованные нет."""
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(
+            self.reader_client.get(url).has_header('Last-Modified')
+        )
+
+    def test_new_post_changes_feeds(self):
+        """Новый пост меняет ETag общей ленты и профиля."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': self.author}),
+        )
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        Post.objects.create(author=self.author, text='Новый')
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_post_edit_and_comment_change_detail(self):
+        """Правка поста и комментарий меняют ETag страницы поста."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        post = Post.objects.get(pk=self.post.pk)
+        changes = (
+            lambda: post.save(),
+            lambda: Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий',
+            ),
+        )
+        for change in changes:
+            etag = self.client.get(url)['ETag']
+            change()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_viewer_and_follow(self):
+        """ETag профиля зависит от читателя и его подписки."""
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        etag = self.reader_client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['following'])
+
+    def test_missing_object_is_404(self):
+        """Для несуществующего объекта условный ответ не строится."""
+        url = reverse('posts:post_detail', kwargs={'post_id': 0})
+        self.assertEqual(self.client.get(url).status_code, 404)
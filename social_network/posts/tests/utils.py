@@ -0,0 +1,32 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class _MaxQueriesContext(CaptureQueriesContext):
+    def __init__(self, test_case, num, connection, label):
+        self.test_case = test_case
+        self.num = num
+        self.label = label
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        queries = '\n'.join(
+            f'{number}. {query["sql"]}'
+            for number, query in enumerate(self.captured_queries, start=1)
+        )
+        self.test_case.assertLessEqual(
+            len(self),
+            self.num,
+            f'{self.label}: {len(self)} запросов при бюджете {self.num}'
+            f'\n{queries}',
+        )
+
+
+class QueryBudgetMixin:
+    """Проверки верхней границы числа запросов к базе."""
+
+    def assertMaxQueries(self, num, label='', using=DEFAULT_DB_ALIAS):
+        return _MaxQueriesContext(self, num, connections[using], label)
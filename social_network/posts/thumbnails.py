@@ -0,0 +1,90 @@
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from .constants import (
+    THUMBNAIL_GEOMETRIES, THUMBNAIL_PENDING_TIMEOUT, THUMBNAIL_URL_TIMEOUT,
+    THUMBNAIL_WORKERS,
+)
+from .storage import media_storage
+
+logger = logging.getLogger(__name__)
+
+URL_KEY = 'thumbnails:url:{}:{}'
+PENDING_KEY = 'thumbnails:pending:{}'
+
+_executor = None
+
+
+def generate(image_name):
+    """Создаёт миниатюры всех используемых в шаблонах геометрий.
+
+    Ключ sorl зависит от хранилища картинки, поэтому оно передаётся то
+    же, что у поля Post.image, иначе шаблон не найдёт миниатюру.
+    """
+    image = ImageFile(image_name, media_storage)
+    try:
+        for geometry, options in THUMBNAIL_GEOMETRIES:
+            thumbnail = get_thumbnail(image, geometry, **options)
+            cache.set(
+                _url_key(geometry, image_name),
+                thumbnail.url,
+                THUMBNAIL_URL_TIMEOUT,
+            )
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s', image_name)
+
+
+def generate_in_worker(image_name):
+    """Вызов generate из фонового потока со своим соединением с базой."""
+    close_old_connections()
+    try:
+        generate(image_name)
+    finally:
+        close_old_connections()
+
+
+def urls(image_names, geometry=THUMBNAIL_GEOMETRIES[0][0]):
+    """URL готовых миниатюр по именам картинок без обращения к файлам.
+
+    Отсутствующие в кэше миниатюры ставятся в очередь на генерацию.
+    """
+    keys = {_url_key(geometry, name): name for name in image_names}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        name = keys[key]
+        if cache.add(PENDING_KEY.format(key), True, THUMBNAIL_PENDING_TIMEOUT):
+            _submit(name)
+    return {keys[key]: url for key, url in found.items()}
+
+
+def schedule(post):
+    """Ставит генерацию миниатюр поста в очередь после коммита."""
+    if not post.image:
+        return
+    image_name = post.image.name
+    transaction.on_commit(lambda: _submit(image_name))
+
+
+def _submit(image_name):
+    if not getattr(settings, 'THUMBNAIL_PREGENERATE_ASYNC', True):
+        generate(image_name)
+        return
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    _executor.submit(generate_in_worker, image_name)
+
+
+def _url_key(geometry, image_name):
+    digest = hashlib.md5(image_name.encode()).hexdigest()
+    return URL_KEY.format(geometry, digest)
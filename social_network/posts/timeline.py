@@ -0,0 +1,63 @@
+from django.db import connection, transaction
+
+from .constants import TIMELINE_BATCH_SIZE
+from .models import Follow, Post, TimelineEntry
+
+
+def fan_out_post(post):
+    """Добавляет новый пост в ленты всех подписчиков автора."""
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id,
+    ).values_list('user_id', flat=True)
+    entries = (
+        TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in follower_ids.iterator()
+    )
+    _bulk_insert(entries)
+
+
+def backfill(user_id, author_id):
+    """Переносит посты автора в ленту нового подписчика."""
+    posts = Post.objects.filter(
+        author_id=author_id,
+    ).values_list('pk', 'pub_date')
+    entries = (
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts.iterator()
+    )
+    _bulk_insert(entries)
+
+
+def prune(user_id, author_id):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id,
+    ).delete()
+
+
+def rebuild():
+    """Полностью пересобирает ленты подписок одним INSERT ... SELECT."""
+    entry, follow, post = (
+        model._meta for model in (TimelineEntry, Follow, Post)
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {entry.db_table}')
+        cursor.execute(
+            f'INSERT INTO {entry.db_table} (user_id, post_id, pub_date) '
+            f'SELECT f.user_id, p.id, p.pub_date '
+            f'FROM {follow.db_table} f '
+            f'INNER JOIN {post.db_table} p ON p.author_id = f.author_id '
+            f'WHERE f.user_id IS NOT NULL'
+        )
+
+
+def _bulk_insert(entries):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= TIMELINE_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
@@ -0,0 +1,87 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .constants import (
+    TRENDING_COMMENT_WEIGHT, TRENDING_HALF_LIFE, TRENDING_MIN_SCORE,
+    TRENDING_REBUILD_DAYS,
+)
+from .models import Comment, PostTrend, TrendingEpoch
+
+EPOCH_PK = 1
+
+
+def epoch():
+    """Точка отсчёта весов, создаётся при первом обращении."""
+    state, _ = TrendingEpoch.objects.get_or_create(
+        pk=EPOCH_PK, defaults={'started': timezone.now()},
+    )
+    return state.started
+
+
+def weight(moment, started):
+    """Вес события в момент moment относительно точки отсчёта."""
+    seconds = (moment - started).total_seconds()
+    return TRENDING_COMMENT_WEIGHT * 2 ** (seconds / TRENDING_HALF_LIFE)
+
+
+def record(post_id, moment, sign=1):
+    """Добавляет или вычитает вес события одним UPDATE.
+
+    Запись создаётся только при добавлении, поэтому вычитание безопасно
+    при каскадном удалении поста.
+    """
+    delta = sign * weight(moment, epoch())
+    trends = PostTrend.objects.filter(post_id=post_id)
+    if trends.update(score=F('score') + delta) or sign < 0:
+        return
+    PostTrend.objects.bulk_create(
+        [PostTrend(post_id=post_id)], ignore_conflicts=True,
+    )
+    trends.update(score=F('score') + delta)
+
+
+def renormalize(now=None):
+    """Переносит точку отсчёта на now и удаляет угасшие записи.
+
+    Без переноса веса новых событий со временем переполнили бы float.
+    Возвращает число удалённых записей.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        epoch()
+        state = TrendingEpoch.objects.select_for_update().get(pk=EPOCH_PK)
+        seconds = (now - state.started).total_seconds()
+        factor = 2 ** -(seconds / TRENDING_HALF_LIFE)
+        PostTrend.objects.update(score=F('score') * factor)
+        pruned, _ = PostTrend.objects.filter(
+            score__lt=TRENDING_MIN_SCORE,
+        ).delete()
+        state.started = now
+        state.save(update_fields=('started',))
+    return pruned
+
+
+def rebuild(now=None):
+    """Пересчитывает популярность по комментариям последних дней."""
+    now = now or timezone.now()
+    since = now - timedelta(days=TRENDING_REBUILD_DAYS)
+    scores = defaultdict(float)
+    for post_id, created in Comment.objects.filter(
+        created__gte=since,
+    ).order_by().values_list('post_id', 'created').iterator():
+        scores[post_id] += weight(created, now)
+    with transaction.atomic():
+        TrendingEpoch.objects.update_or_create(
+            pk=EPOCH_PK, defaults={'started': now},
+        )
+        PostTrend.objects.all().delete()
+        PostTrend.objects.bulk_create(
+            PostTrend(post_id=post_id, score=score)
+            for post_id, score in scores.items()
+            if score >= TRENDING_MIN_SCORE
+        )
+    return len(scores)
@@ -8,6 +8,8 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('hot/', views.hot, name='hot'),
+    path('search/', views.post_search, name='search'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -27,4 +29,9 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow',
     ),
+    path(
+        'profile/<str:username>/export/',
+        views.profile_export,
+        name='profile_export',
+    ),
 ]
@@ -1,12 +1,208 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
 
-from .constants import POSTS_PAGE
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
 
+from .constants import FEED_ORDERING, PAGE_WINDOW, POSTS_PAGE
 
-def paginator_func(request, post_list):
-    """Функция paginator."""
-    paginator_variable = Paginator(post_list, POSTS_PAGE)
+PAGE_PARAMS = ('page', 'after', 'before')
+
+
+class WindowedPage(Page):
+    """Страница классической пагинации с окном номеров страниц."""
+    is_cursor = False
+    base_query = ''
+
+    @property
+    def page_window(self):
+        first = max(self.number - PAGE_WINDOW, 1)
+        last = min(self.number + PAGE_WINDOW, self.paginator.num_pages)
+        return range(first, last + 1)
+
+
+class WindowedPaginator(Paginator):
+    """Paginator, возвращающий страницы с окном номеров."""
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+class CursorPage:
+    """Страница курсорной пагинации.
+
+    Запрос к базе выполняется при первом обращении к записям, поэтому
+    страница, целиком взятая из кэша шаблона, не обращается к базе.
+    """
+    is_cursor = True
+    base_query = ''
+
+    def __init__(self, paginator, loader):
+        self.paginator = paginator
+        self._loader = loader
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    @cached_property
+    def _result(self):
+        return self._loader()
+
+    @property
+    def object_list(self):
+        return self._result[0]
+
+    def has_next(self):
+        return self._result[1]
+
+    def has_previous(self):
+        return self._result[2]
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        """Курсор для перехода к более старым записям."""
+        if self.has_next():
+            return self.paginator.cursor_for(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        """Курсор для перехода к более новым записям."""
+        if self.has_previous():
+            return self.paginator.cursor_for(self.object_list[0])
+        return None
+
+    @property
+    def estimated_count(self):
+        return self.paginator.estimated_count()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по полям ordering без COUNT и OFFSET."""
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING,
+                 total=None):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.ordering = ordering
+        self.total = total
+
+    def page(self, after=None, before=None):
+        """Возвращает страницу старше after или новее before."""
+        return CursorPage(self, lambda: self._load(after, before))
+
+    def _load(self, after, before):
+        values = self.decode_cursor(after or before)
+        if values is None:
+            rows = list(self._ordered(self.ordering)[:self.per_page + 1])
+            return rows[:self.per_page], len(rows) > self.per_page, False
+        if after:
+            queryset = self._ordered(self.ordering).filter(
+                self._seek(values, reverse=False)
+            )
+            rows = list(queryset[:self.per_page + 1])
+            return rows[:self.per_page], len(rows) > self.per_page, True
+        reversed_ordering = tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        )
+        queryset = self._ordered(reversed_ordering).filter(
+            self._seek(values, reverse=True)
+        )
+        rows = list(queryset[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return rows, True, has_previous
+
+    def cursor_for(self, obj):
+        """Кодирует значения полей ordering объекта или словаря в курсор."""
+        if isinstance(obj, dict):
+            values = [obj[field.lstrip('-')] for field in self.ordering]
+        else:
+            values = [
+                getattr(obj, field.lstrip('-')) for field in self.ordering
+            ]
+        raw = json.dumps(values, default=lambda value: value.isoformat())
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Декодирует курсор, для некорректного возвращает None."""
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw)
+        except (binascii.Error, ValueError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            return None
+        return values
+
+    def estimated_count(self):
+        """Число записей, если оно известно без COUNT, иначе None.
+
+        Например, денормализованный счётчик постов автора.
+        """
+        return self.total
+
+    def _ordered(self, ordering):
+        return self.object_list.order_by(*ordering)
+
+    def _seek(self, values, reverse):
+        """Условие keyset: записи строго после курсора."""
+        condition = Q()
+        equal = {}
+        bound = None
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+            if bound is None:
+                # Нестрогая граница по первому полю даёт базе диапазон
+                # индекса: условие с OR SQLite диапазоном не считает.
+                bound = Q(**{f'{name}__{lookup}e': value})
+        return bound & condition
+
+
+def paginator_func(request, post_list, ordering=FEED_ORDERING, total=None):
+    """Функция paginator.
+
+    Параметр page включает классическую пагинацию с номерами страниц,
+    иначе используется курсорная по after/before. total - заранее
+    известное число записей для курсорной пагинации.
+    """
+    query = request.GET.copy()
+    for param in PAGE_PARAMS:
+        query.pop(param, None)
     page_number = request.GET.get('page')
-    page_obj = paginator_variable.get_page(page_number)
+    if page_number is not None:
+        paginator_variable = WindowedPaginator(post_list, POSTS_PAGE)
+        page_obj = paginator_variable.get_page(page_number)
+    else:
+        paginator_variable = CursorPaginator(
+            post_list, POSTS_PAGE, ordering, total=total,
+        )
+        page_obj = paginator_variable.page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    page_obj.base_query = query.urlencode()
 
     return page_obj
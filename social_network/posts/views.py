@@ -1,54 +1,127 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+
+from core.ratelimit import ratelimit
+from core.routers import read_from_replica
+
+from . import (
+    export, follow_graph, images, recommendations, search, thumbnails,
+)
+from .conditional import (
+    conditional, group_freshness, index_freshness, post_freshness,
+    profile_freshness,
+)
+from .constants import TIMELINE_ORDERING
+from .feed_cache import feed_cache_context
+from .page_cache import anonymous_page_cache
 from .forms import PostForm, CommentForm
 from .models import Post, Group, User, Follow
+from .stats import ensure as ensure_stats
 from .utils import paginator_func
 
 
+@anonymous_page_cache
+@read_from_replica
+@conditional(index_freshness)
 def index(request):
     """View функция для index."""
-    post_list = Post.objects.all()
+    post_list = Post.objects.for_feed()
     context = {
         'page_obj': paginator_func(request, post_list),
+        **feed_cache_context(request, 'index'),
     }
 
     return render(request, 'posts/index.html', context)
 
 
+@anonymous_page_cache
+@read_from_replica
+@conditional(group_freshness)
 def group_posts(request, slug):
     """View функция для group_posts."""
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
+    post_list = group.posts.for_feed()
     context = {
         'group': group,
         'page_obj': paginator_func(request, post_list),
+        **feed_cache_context(request, f'group:{group.pk}'),
     }
 
     return render(request, 'posts/group_list.html', context)
 
 
+@anonymous_page_cache
+@read_from_replica
+@conditional(profile_freshness)
 def profile(request, username):
     """View функция для profile."""
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('group')
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username,
+    )
+    stats = ensure_stats(author)
+    post_list = author.posts.for_feed()
     if request.user.is_authenticated:
-        following = request.user.follower.filter(author=author).exists()
+        following = follow_graph.is_following(request.user.pk, author.pk)
     else:
         following = False
     context = {
         'author': author,
-        'page_obj': paginator_func(request, post_list),
+        'page_obj': paginator_func(
+            request, post_list, total=stats.posts_count,
+        ),
         'following': following,
+        'recommendations': recommendations.top_for(request.user),
+        **feed_cache_context(request, f'author:{author.pk}'),
     }
 
     return render(request, 'posts/profile.html', context)
 
 
+def hot(request):
+    """View функция для популярных постов."""
+    ordering = ('-hot_score', '-pk')
+    post_list = Post.objects.for_feed().filter(
+        trend__score__gt=0,
+    ).annotate(hot_score=F('trend__score')).order_by(*ordering)
+    context = {
+        'page_obj': paginator_func(request, post_list, ordering=ordering),
+        **feed_cache_context(request, 'hot'),
+    }
+
+    return render(request, 'posts/hot.html', context)
+
+
+def post_search(request):
+    """View функция для поиска по постам."""
+    query = request.GET.get('q', '').strip()
+    post_list = search.search(query, Post.objects.for_feed())
+    context = {
+        'query': query,
+        'page_obj': paginator_func(
+            request, post_list, ordering=('-score', '-pk'),
+        ),
+    }
+
+    return render(request, 'posts/search.html', context)
+
+
+@anonymous_page_cache
+@read_from_replica
+@conditional(post_freshness)
 def post_detail(request, post_id):
     """View функция для post_detail."""
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        pk=post_id,
+    )
+    ensure_stats(post.author)
+    comments = post.comments.select_related('author').order_by(
+        'created',
+    )
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
@@ -60,6 +133,8 @@ def post_detail(request, post_id):
 
 
 @login_required
+@ratelimit('post_create', '5/m')
+@ratelimit('post_create', '50/d')
 def post_create(request):
     """View функция для создания записи."""
     form = PostForm(
@@ -69,7 +144,11 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        with transaction.atomic():
+            post.save()
+            if post.image:
+                images.create_variants(post)
+            thumbnails.schedule(post)
 
         return redirect('posts:profile', post.author)
 
@@ -90,7 +169,13 @@ def post_edit(request, post_id):
         return redirect('posts:post_detail', post_id=post_id)
 
     if form.is_valid():
-        form.save()
+        if 'image' in form.changed_data:
+            with transaction.atomic():
+                post = form.save()
+                images.create_variants(post)
+                thumbnails.schedule(post)
+        else:
+            form.save()
 
         return redirect('posts:post_detail', post_id=post_id)
 
@@ -104,6 +189,8 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('add_comment', '10/m')
+@ratelimit('add_comment', '200/d')
 def add_comment(request, post_id):
     """View функция для добавления комментариев."""
     post = get_object_or_404(Post, pk=post_id)
@@ -118,25 +205,33 @@ def add_comment(request, post_id):
 
 
 @login_required
+@read_from_replica
 def follow_index(request):
     """View функция для отображения подписок."""
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = Post.objects.for_feed().filter(
+        timeline_entries__user=request.user,
+    ).annotate(
+        feed_date=F('timeline_entries__pub_date'),
+        feed_post=F('timeline_entries__post_id'),
+    )
     context = {
-        'page_obj': paginator_func(request, posts),
+        'page_obj': paginator_func(
+            request, posts, ordering=TIMELINE_ORDERING,
+        ),
+        'recommendations': recommendations.top_for(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('profile_follow', '30/m', methods=('GET', 'POST'))
 def profile_follow(request, username):
     """View функция для того, чтобы подписаться."""
     author = get_object_or_404(User, username=username)
-    follower = Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).exists()
-    if request.user != author and not follower:
-        Follow.objects.create(
+    if request.user != author:
+        # Уникальное ограничение на (user, author) защищает от гонки
+        # параллельных запросов, get_or_create её обрабатывает.
+        Follow.objects.get_or_create(
             user=request.user,
             author=author
         )
@@ -150,3 +245,22 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_export(request, username):
+    """View функция для выгрузки постов и комментариев пользователя."""
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        return redirect('posts:profile', username=username)
+
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in export.FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки.')
+
+    content_type, stream = export.FORMATS[export_format]
+    response = StreamingHttpResponse(stream(author), content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}.{export_format}"'
+    )
+    return response
@@ -29,10 +29,13 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,7 +51,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,9 +73,26 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    # Реплика для чтения лент. Локально её заменяет копия основного файла:
+    # sqlite3 db.sqlite3 ".backup db.replica.sqlite3".
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv(
+            'REPLICA_DB_NAME', os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        ),
+    },
 }
 
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# Алиасы реплик через запятую, например DATABASE_REPLICAS=replica.
+# Без них всё читается из основной базы.
+DATABASE_REPLICAS = [
+    alias for alias in os.getenv('DATABASE_REPLICAS', '').split(',')
+    if alias
+]
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -105,6 +125,16 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 
+# ModelBackend остаётся для сессий, созданных до кэширующего бэкенда:
+# get_user отклоняет сессию, бэкенда которой нет в списке.
+AUTHENTICATION_BACKENDS = [
+    'core.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Сессии читаются из кэша, каждое изменение сразу пишется в базу.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -121,8 +151,31 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Передача файлов медиа фронт-прокси: X-Accel-Redirect для nginx или
+# X-Sendfile для Apache. Без значения файлы отдаёт Django.
+MEDIA_SENDFILE_HEADER = os.getenv('MEDIA_SENDFILE_HEADER') or None
+
+# Внутренний location nginx, указывающий на MEDIA_ROOT.
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Миниатюры новых картинок создаются в фоновых потоках.
+THUMBNAIL_PREGENERATE_ASYNC = True
+
+# У каждого процесса свой кэш, поэтому поколения лент, по которым
+# сбрасываются фрагменты и страницы, хранятся в базе (FeedGeneration).
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.InstrumentedLocMemCache',
     }
 }
+
+# Ограничения частоты запросов из core.ratelimit.
+RATELIMIT_ENABLED = True
+
+# Адреса и сети обратных прокси через запятую, например
+# TRUSTED_PROXIES=127.0.0.1,10.0.0.0/8. За ними адрес клиента берётся
+# из X-Forwarded-For, без них - из REMOTE_ADDR.
+TRUSTED_PROXIES = [
+    proxy for proxy in os.getenv('TRUSTED_PROXIES', '').split(',')
+    if proxy
+]
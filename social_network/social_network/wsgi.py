@@ -5,3 +5,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_network.settings')
 
 application = get_wsgi_application()
+
+# Каждый рабочий процесс со своим LocMemCache прогревает его после старта.
+if os.getenv('WARM_CACHES_ON_START'):
+    from core.warmup import warm_in_background
+
+    warm_in_background()